@@ -5,12 +5,100 @@ Uses YOLO for face detection and DeepFace for face matching
 
 import cv2
 import numpy as np
-from PIL import Image
-from io import BytesIO
 from typing import Tuple, Optional, Dict, Any
 from ultralytics import YOLO
-import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import logging
+import math
 import os
+import platform
+import threading
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    # ONNX Runtime is optional - the Keras/ultralytics path is used instead
+    ort = None
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional - the NumPy cosine distance is used instead
+    njit = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+except ImportError:
+    # PyTurboJPEG is optional - cv2.imdecode is used instead
+    TurboJPEG = None
+
+
+def _cosine_distance_numpy(a: np.ndarray, b: np.ndarray) -> float:
+    return float(1.0 - np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+if njit is not None:
+    # For 512-dim vectors a fused AVX loop beats the three dispatched
+    # NumPy calls (dot + two norms), which each carry fixed overhead
+    @njit(fastmath=True, cache=True)
+    def _cosine_distance(a, b):
+        s = 0.0
+        na = 0.0
+        nb = 0.0
+        for i in range(a.shape[0]):
+            s += a[i] * b[i]
+            na += a[i] * a[i]
+            nb += b[i] * b[i]
+        return 1.0 - s / math.sqrt(na * nb)
+else:
+    _cosine_distance = _cosine_distance_numpy
+
+
+def _configure_thread_pools() -> int:
+    """
+    Give OpenCV, the BLAS/OpenMP runtimes, and (when present) Torch one
+    shared thread budget. Left alone, each library spawns its own pool
+    sized to the whole machine and the oversubscription thrashes caches
+    once several of them run in the same process.
+    """
+    workers = max(1, (os.cpu_count() or 2) // 2)
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(workers)
+    os.environ.setdefault('OMP_NUM_THREADS', str(workers))
+    os.environ.setdefault('MKL_NUM_THREADS', str(workers))
+    try:
+        import torch
+        torch.set_num_threads(workers)
+    except ImportError:
+        pass
+    return workers
+
+
+_NUM_THREADS = _configure_thread_pools()
+
+
+def _is_intel_cpu() -> bool:
+    """
+    Detect an Intel CPU. platform.processor() returns '' on Linux, so
+    fall back to the vendor_id line in /proc/cpuinfo there.
+    """
+    proc = platform.processor()
+    if proc:
+        return 'intel' in proc.lower()
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('vendor_id'):
+                    return 'genuineintel' in line.lower()
+    except OSError:
+        pass
+    return False
+
+
+logger = logging.getLogger(__name__)
 
 
 class FaceVerificationError(Exception):
@@ -18,27 +106,247 @@ class FaceVerificationError(Exception):
     pass
 
 
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent embedding requests into single ArcFace
+    forward passes.
+
+    Each in-flight verification needs one or two embeddings; collecting
+    requests for up to ``max_wait`` seconds (or ``max_batch`` crops) and
+    running one batched forward amortizes the per-call model dispatch
+    across every waiting request.
+    """
+
+    def __init__(self, verifier: 'FaceVerifier', max_batch: int = 16,
+                 max_wait: float = 0.01):
+        self.verifier = verifier
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def embed(self, face_crop: np.ndarray) -> np.ndarray:
+        """Queue a crop for embedding and wait for the batched result"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((face_crop, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            crops = [crop for crop, _ in batch]
+
+            def _embed(crops=crops):
+                self.verifier._ensure_arcface()
+                return self.verifier._embed_faces(crops)
+
+            try:
+                embeddings = await loop.run_in_executor(None, _embed)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+
 class FaceVerifier:
     """
     Face verification class using YOLO for detection and DeepFace for matching.
     Optimized for CPU inference without any model training.
     """
     
-    def __init__(self, distance_threshold: float = 0.25):
+    # Pre-exported ONNX graphs (optional - used when present alongside
+    # onnxruntime for 2-4x faster CPU inference than Keras/ultralytics)
+    YOLO_ONNX_PATH = 'yolov8n-face.onnx'
+    # Dedicated InsightFace SCRFD detector - purpose-built for faces, so it
+    # replaces the generic-YOLO + Haar two-stage dance when present
+    SCRFD_ONNX_PATH = 'scrfd_500m.onnx'
+    ARCFACE_ONNX_PATH = 'arcface.onnx'
+    # Int8-quantized variants (produced offline with quantize_onnx_model).
+    # VNNI int8 dot products give roughly 4x FP32 GEMM throughput on CPU.
+    YOLO_INT8_ONNX_PATH = 'yolov8n-face.int8.onnx'
+    ARCFACE_INT8_ONNX_PATH = 'arcface.int8.onnx'
+
+    # Standard InsightFace 5-point landmark template for 112x112 crops
+    # (left eye, right eye, nose, left mouth corner, right mouth corner)
+    ARCFACE_TEMPLATE = np.array([
+        [38.2946, 51.6963],
+        [73.5318, 51.5014],
+        [56.0252, 71.7366],
+        [41.5493, 92.3655],
+        [70.7299, 92.2041],
+    ], dtype=np.float32)
+
+    # Voters retry with the same ID image; cache that many embeddings
+    EMBEDDING_CACHE_SIZE = 2048
+    # Identical (ID, selfie) pairs short-circuit the whole pipeline
+    RESULT_CACHE_SIZE = 256
+
+    def __init__(self, distance_threshold: float = 0.25, use_int8: bool = True,
+                 enable_haar_fallback: bool = False, yolo_imgsz: int = 640,
+                 warmup: bool = True, cache: bool = True):
         """
         Initialize the face verifier.
-        
+
         Args:
             distance_threshold: Maximum distance for faces to be considered a match.
                                Lower values are more strict. (0.25 = very strict, secure)
+            use_int8: Prefer int8-quantized ONNX models when available.
+                      Set False if the quantization accuracy loss is unacceptable.
+            enable_haar_fallback: Re-run detection with the Haar cascade when
+                      YOLO finds nothing. Off by default - with a face model
+                      and a low confidence threshold the second full pass
+                      only adds surprise 2x latency spikes.
+            yolo_imgsz: Detector input resolution. 320 quarters the FLOPs
+                      for deployments that only see small selfies.
+            warmup: Run a synthetic frame through the detector at
+                      construction so kernel autotuning and graph tracing
+                      happen here instead of on the first voter's request.
+                      Tests can pass False to keep construction cheap.
+            cache: Memoize full verification results on the content hashes
+                      of both images. Resubmitted identical pairs return in
+                      O(1) instead of re-running detection and ArcFace.
         """
         self.distance_threshold = distance_threshold
+        self.use_int8 = use_int8
+        self.enable_haar_fallback = enable_haar_fallback
+        self.yolo_imgsz = yolo_imgsz
         self.min_face_size = 60  # Minimum face size in pixels (adjusted for voter ID cards)
         self.min_confidence = 0.6  # Minimum detection confidence (60% for voter IDs)
+        try:
+            import torch
+            self._use_cuda = torch.cuda.is_available()
+        except ImportError:
+            self._use_cuda = False
+        self.device = 'cuda:0' if self._use_cuda else 'cpu'
         self.yolo_model = None
         self._deepface = None  # Lazy-loaded DeepFace module
-        self._load_yolo_model()
+        self._arcface = None   # Cached ArcFace model (built once, reused)
+        self._yolo_session = None     # Optional ONNX Runtime sessions
+        self._arcface_session = None
+        self._scrfd_session = None
+        self._turbojpeg = None
+        if TurboJPEG is not None:
+            try:
+                self._turbojpeg = TurboJPEG()
+            except Exception as e:
+                # Wrapper installed but libturbojpeg missing - not fatal
+                logger.warning("TurboJPEG unavailable: %s", e)
+        # Built once - re-parsing the cascade XML per fallback call costs
+        # tens of ms of pure overhead
+        self._face_cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+        # LRU of content-hash -> ArcFace embedding (see _embedding_for).
+        # verify_faces_async runs verify_faces on executor threads, so
+        # both LRUs get a lock - an unguarded move_to_end racing an
+        # eviction raises KeyError
+        self._embedding_cache: 'OrderedDict[bytes, np.ndarray]' = OrderedDict()
+        self._emb_lock = threading.Lock()
+        self.cache_results = cache
+        # LRU of (id hash, selfie hash, threshold) -> full result dict
+        self._result_cache: 'OrderedDict[tuple, Dict[str, Any]]' = OrderedDict()
+        self._result_lock = threading.Lock()
+        self._batcher: Optional[EmbeddingBatcher] = None
+        # Persistent pool for the paired ID/selfie detections - spawning
+        # threads per request wastes a few ms each call
+        self._pool = ThreadPoolExecutor(max_workers=2,
+                                        thread_name_prefix='face-detect')
+        # Reusable per-thread detection input buffers (see _detect_faces_onnx)
+        self._detect_buffers = threading.local()
+        self._load_onnx_models()
+        if self._yolo_session is None:
+            self._load_yolo_model()
+        self._warmup_enabled = warmup
+        if warmup:
+            self._warmup_detector()
     
+    def _load_onnx_models(self):
+        """
+        Load pre-exported ONNX graphs for detection and ArcFace if both
+        onnxruntime and the model files are available. A fused ONNX graph
+        avoids the per-op Python dispatch of the Keras/ultralytics stacks.
+        """
+        if ort is None:
+            return
+
+        # One-time export: turn the bundled .pt weights into the ONNX graph
+        # this loader looks for, so the fast path lights up without a
+        # separate conversion step
+        if (not os.path.exists(self.YOLO_ONNX_PATH)
+                and not os.path.exists(self.YOLO_INT8_ONNX_PATH)
+                and os.path.exists('yolov8n-face.pt')):
+            try:
+                YOLO('yolov8n-face.pt').export(
+                    format='onnx', imgsz=self.yolo_imgsz, simplify=True
+                )
+            except Exception as e:
+                logger.warning("One-time YOLO ONNX export failed: %s", e)
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = \
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_options.intra_op_num_threads = _NUM_THREADS
+        sess_options.inter_op_num_threads = 1
+
+        providers = ['CPUExecutionProvider']
+        # OpenVINO's CPU plugin adds VNNI int8 paths and pattern-matched
+        # fusions the default EP lacks; only worthwhile on Intel parts
+        if ('OpenVINOExecutionProvider' in ort.get_available_providers()
+                and _is_intel_cpu()):
+            providers.insert(
+                0, ('OpenVINOExecutionProvider', {'device_type': 'CPU_FP32'})
+            )
+
+        if os.path.exists(self.SCRFD_ONNX_PATH):
+            self._scrfd_session = ort.InferenceSession(
+                self.SCRFD_ONNX_PATH, sess_options, providers=providers
+            )
+
+        yolo_path = self._pick_onnx_model(
+            self.YOLO_ONNX_PATH, self.YOLO_INT8_ONNX_PATH
+        )
+        if yolo_path is not None:
+            self._yolo_session = ort.InferenceSession(
+                yolo_path, sess_options, providers=providers
+            )
+        arcface_path = self._pick_onnx_model(
+            self.ARCFACE_ONNX_PATH, self.ARCFACE_INT8_ONNX_PATH
+        )
+        if arcface_path is not None:
+            self._arcface_session = ort.InferenceSession(
+                arcface_path, sess_options, providers=providers
+            )
+
+    def _pick_onnx_model(self, fp32_path: str, int8_path: str) -> Optional[str]:
+        """Choose the int8 graph when enabled and present, else FP32"""
+        if self.use_int8 and os.path.exists(int8_path):
+            return int8_path
+        if os.path.exists(fp32_path):
+            return fp32_path
+        return None
+
     def _load_yolo_model(self):
         """Load YOLO model for face detection"""
         try:
@@ -49,74 +357,446 @@ class FaceVerifier:
             except Exception:
                 # Fallback to standard YOLOv8 nano model
                 self.yolo_model = YOLO('yolov8n.pt')
-                print("Using general YOLO model - face detection may be less accurate")
+                logger.warning("Using general YOLO model - face detection may be less accurate")
         except Exception as e:
             raise FaceVerificationError(f"Failed to load YOLO model: {str(e)}")
     
+    def _warmup_detector(self):
+        """
+        Push one synthetic frame through the detection stack. The first
+        real call otherwise pays lazy kernel autotuning and graph setup,
+        adding seconds of tail latency to an unlucky voter's request.
+        """
+        try:
+            dummy = np.zeros((self.yolo_imgsz, self.yolo_imgsz, 3),
+                             dtype=np.uint8)
+            self._detect_faces_yolo(dummy)
+        except Exception as e:
+            logger.warning("Detector warmup failed: %s", e)
+
+    def _ensure_arcface(self):
+        """
+        Import DeepFace and build the ArcFace model exactly once.
+
+        DeepFace.verify rebuilds the model on every call when no handle is
+        kept, so we cache the built model and go through represent() instead.
+        """
+        if self._arcface is not None or self._arcface_session is not None:
+            return
+        try:
+            if self._use_cuda:
+                try:
+                    # Mixed precision lets the ArcFace GEMMs hit the tensor
+                    # cores; harmless no-op if the policy is unsupported
+                    from tensorflow.keras import mixed_precision
+                    mixed_precision.set_global_policy('mixed_float16')
+                except Exception:
+                    pass
+
+            # Import DeepFace lazily here to avoid import-time dependency
+            # issues in environments without TensorFlow.
+            from deepface import DeepFace as _DeepFace
+            self._deepface = _DeepFace
+            self._arcface = _DeepFace.build_model("ArcFace")
+            if self._warmup_enabled:
+                # One synthetic crop traces the TF graph now rather than
+                # inside the first verification
+                try:
+                    model = getattr(self._arcface, 'model', self._arcface)
+                    model.predict(
+                        np.zeros((1, 112, 112, 3), np.float32), verbose=0
+                    )
+                except Exception as e:
+                    logger.warning("ArcFace warmup failed: %s", e)
+        except Exception as e:
+            raise FaceVerificationError(
+                f"DeepFace/TensorFlow is not available: {e}"
+            )
+
+    def _embed_faces(self, face_crops: list) -> np.ndarray:
+        """
+        Compute ArcFace embeddings for several cropped faces (BGR ndarrays)
+        in a single batched forward pass - one kernel launch instead of one
+        per face.
+
+        Returns:
+            Array of shape (N, embedding_dim)
+        """
+        # blobFromImages fuses resize to 112x112, BGR->RGB, and the
+        # [-1, 1] normalization into one SIMD pass instead of several
+        # NumPy temporaries per crop; transpose NCHW back to the NHWC
+        # layout the models expect.
+        blob = cv2.dnn.blobFromImages(
+            face_crops, scalefactor=1.0 / 127.5, size=(112, 112),
+            mean=(127.5, 127.5, 127.5), swapRB=True, crop=False
+        )
+        batch = np.ascontiguousarray(blob.transpose(0, 2, 3, 1))
+
+        if self._arcface_session is not None:
+            input_name = self._arcface_session.get_inputs()[0].name
+            embeddings = self._arcface_session.run(None, {input_name: batch})[0]
+        else:
+            # DeepFace wraps the Keras model; fall back to the object itself
+            # for older versions that return the bare model.
+            model = getattr(self._arcface, 'model', self._arcface)
+            embeddings = model.predict(batch, verbose=0)
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        # L2-normalize once here so cached vectors are unit length and the
+        # distance reduces to a dot product
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def embedding_batcher(self, max_batch: int = 16,
+                          max_wait: float = 0.01) -> EmbeddingBatcher:
+        """
+        Lazily create the micro-batching front end for async callers:
+            embedding = await verifier.embedding_batcher().embed(crop)
+        """
+        if self._batcher is None:
+            self._batcher = EmbeddingBatcher(self, max_batch, max_wait)
+        return self._batcher
+
+    def _cached_embedding(self, key: bytes) -> Optional[np.ndarray]:
+        """Look up a cached embedding by content hash (LRU refresh on hit)"""
+        with self._emb_lock:
+            embedding = self._embedding_cache.get(key)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(key)
+            return embedding
+
+    def _store_embedding(self, key: bytes, embedding: np.ndarray) -> None:
+        """Store an embedding, evicting the least recently used entries"""
+        with self._emb_lock:
+            self._embedding_cache[key] = embedding
+            self._embedding_cache.move_to_end(key)
+            while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+
     def _bytes_to_cv2(self, image_bytes: bytes) -> np.ndarray:
-        """Convert image bytes to OpenCV format"""
+        """
+        Convert image bytes to OpenCV format.
+
+        Oversized JPEGs are decoded at reduced scale via libjpeg's DCT
+        scaling (IMREAD_REDUCED_COLOR_*), which skips the high-frequency
+        IDCT work entirely - much cheaper than a full decode followed by
+        a resize, and detection runs at 640px regardless.
+
+        When PyTurboJPEG is installed, JPEG bytes go through
+        libjpeg-turbo's SIMD Huffman+IDCT paths instead, 2-3x faster than
+        stock libjpeg for the large phone uploads that dominate here.
+        """
+        # JPEG magic: FF D8. PNG/WebP fall through to cv2.imdecode.
+        if self._turbojpeg is not None and image_bytes[:2] == b'\xff\xd8':
+            try:
+                scaling = ((1, 2) if len(image_bytes) > 500_000 else (1, 1))
+                img = self._turbojpeg.decode(
+                    image_bytes, pixel_format=TJPF_BGR,
+                    scaling_factor=scaling
+                )
+                if img is not None:
+                    return img
+            except Exception:
+                pass  # Corrupt or unusual JPEG - let OpenCV try
+
         nparr = np.frombuffer(image_bytes, np.uint8)
+
+        if len(image_bytes) > 500_000:
+            reduced = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_COLOR_2)
+            if reduced is not None and min(reduced.shape[:2]) >= 640:
+                if max(reduced.shape[:2]) > 1600:
+                    quarter = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_COLOR_4)
+                    if quarter is not None and min(quarter.shape[:2]) >= 640:
+                        return quarter
+                return reduced
+
         img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         if img is None:
             raise FaceVerificationError("Failed to decode image")
         return img
     
-    def _detect_faces_yolo(self, image: np.ndarray) -> list:
+    def _detect_faces_yolo(self, image: np.ndarray,
+                           gray: Optional[np.ndarray] = None) -> list:
         """
         Detect faces in image using YOLO.
-        
+
+        Args:
+            image: Input BGR image
+            gray: Optional precomputed grayscale of the same image, reused
+                  by the Haar fallback to skip a second BGR2GRAY pass
+
         Returns:
             List of face bounding boxes with confidence scores
         """
-        results = self.yolo_model(image, verbose=False)
+        if self._scrfd_session is not None:
+            return self._detect_faces_scrfd(image, gray=gray)
+        if self._yolo_session is not None:
+            return self._detect_faces_onnx(image, gray=gray)
+
+        # Pre-resize so the long side is 640 - YOLOv8n ingests 640px anyway,
+        # and letterboxing a multi-megapixel frame inside ultralytics is
+        # memory-bound waste. Boxes are scaled back to original coordinates.
+        h, w = image.shape[:2]
+        scale = min(1.0, self.yolo_imgsz / max(h, w))
+        if scale < 1.0:
+            small = cv2.resize(
+                image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+        else:
+            small = image
+
+        # conf/iou passed down so ultralytics runs NMS at these thresholds
+        # natively instead of post-filtering; FP16 on CUDA runs the GEMMs
+        # on tensor cores at roughly half the memory bandwidth
+        results = self.yolo_model(
+            small, verbose=False, conf=0.25, iou=0.45,
+            device=self.device, half=self._use_cuda
+        )
         faces = []
-        
+
         for result in results:
             boxes = result.boxes
-            for box in boxes:
-                # Get class name - check if it's a person/face
-                cls_id = int(box.cls[0])
-                cls_name = result.names[cls_id].lower()
-                
-                # Accept 'face' or 'person' class
-                if 'face' in cls_name or 'person' in cls_name:
-                    conf = float(box.conf[0])
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    faces.append({
-                        'bbox': (x1, y1, x2, y2),
-                        'confidence': conf
-                    })
-        
-        # If using person detection, we need to detect face within person region
-        # For now, if no faces found, try using DeepFace's built-in detector as fallback
-        if not faces:
-            faces = self._detect_faces_fallback(image)
+            if boxes is None or len(boxes) == 0:
+                continue
+
+            # Pull each tensor across once and filter with NumPy - per-box
+            # attribute access costs one tiny device-to-host sync each
+            cls_ids = boxes.cls.cpu().numpy().astype(int)
+            confs = boxes.conf.cpu().numpy()
+            xyxy = boxes.xyxy.cpu().numpy() / scale
+            keypoints = getattr(result, 'keypoints', None)
+            names = result.names
+
+            # Accept 'face' or 'person' class
+            wanted = np.array([
+                'face' in names[c].lower() or 'person' in names[c].lower()
+                for c in cls_ids
+            ], dtype=bool)
+
+            for i in np.flatnonzero(wanted):
+                x1, y1, x2, y2 = xyxy[i].astype(int)
+                face = {
+                    'bbox': (int(x1), int(y1), int(x2), int(y2)),
+                    'confidence': float(confs[i])
+                }
+                # Face-specific YOLO models emit 5-point landmarks,
+                # which allow canonical ArcFace alignment later on
+                if keypoints is not None and len(keypoints.xy) > i:
+                    pts = np.asarray(keypoints.xy[i], dtype=np.float32) / scale
+                    if pts.shape[0] >= 5:
+                        face['landmarks'] = pts[:5]
+                faces.append(face)
         
+        if not faces and self.enable_haar_fallback:
+            faces = self._detect_faces_fallback(image, gray=gray)
+
         return faces
     
-    def _detect_faces_fallback(self, image: np.ndarray) -> list:
+    def _detect_faces_onnx(self, image: np.ndarray,
+                           gray: Optional[np.ndarray] = None) -> list:
         """
-        Fallback face detection using OpenCV Haar cascades.
+        Detect faces with the exported YOLO ONNX graph: letterbox to
+        640x640, single session.run, NMS in OpenCV.
         """
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        input_size = self.yolo_imgsz
+        h, w = image.shape[:2]
+        scale = min(input_size / h, input_size / w)
+        new_h, new_w = int(round(h * scale)), int(round(w * scale))
+        resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        # Reuse per-thread letterbox and input buffers - a long-lived
+        # server otherwise churns a fresh 640x640 canvas plus a 4.7MB
+        # float tensor through the allocator on every detection. Buffers
+        # are thread-local because the ID/selfie detections run
+        # concurrently on the internal pool.
+        buf = self._detect_buffers
+        canvas = getattr(buf, 'canvas', None)
+        if canvas is None or canvas.shape[0] != input_size:
+            canvas = np.empty((input_size, input_size, 3), dtype=np.uint8)
+            buf.canvas = canvas
+            buf.x = np.empty((1, 3, input_size, input_size), dtype=np.float32)
+        canvas[:] = 114
+        canvas[:new_h, :new_w] = resized
+
+        # BGR -> RGB, HWC -> NCHW, [0, 1] - written in place
+        x = buf.x
+        np.divide(canvas[:, :, ::-1].transpose(2, 0, 1), 255.0,
+                  out=x[0], casting='unsafe')
+
+        input_name = self._yolo_session.get_inputs()[0].name
+        output = self._yolo_session.run(None, {input_name: x})[0]
+
+        # YOLOv8 output is (1, 4 + num_classes, num_anchors): cx,cy,w,h + scores
+        preds = output[0].T
+        boxes_cxcywh = preds[:, :4]
+        scores = preds[:, 4:].max(axis=1)
+
+        keep = scores >= 0.25
+        boxes_cxcywh = boxes_cxcywh[keep]
+        scores = scores[keep]
+
+        faces = []
+        if len(scores) > 0:
+            xy = boxes_cxcywh[:, :2] - boxes_cxcywh[:, 2:] / 2
+            wh = boxes_cxcywh[:, 2:]
+            indices = cv2.dnn.NMSBoxes(
+                np.hstack([xy, wh]).tolist(), scores.tolist(), 0.25, 0.45
+            )
+            for idx in np.asarray(indices).flatten():
+                x1, y1 = xy[idx] / scale
+                x2, y2 = (xy[idx] + wh[idx]) / scale
+                faces.append({
+                    'bbox': (int(x1), int(y1), int(x2), int(y2)),
+                    'confidence': float(scores[idx])
+                })
+
+        if not faces and self.enable_haar_fallback:
+            faces = self._detect_faces_fallback(image, gray=gray)
+
+        return faces
+
+    def _detect_faces_scrfd(self, image: np.ndarray,
+                            gray: Optional[np.ndarray] = None) -> list:
+        """
+        Detect faces with an InsightFace SCRFD ONNX graph. A 2.5MB
+        purpose-built face detector beats the generic YOLO + Haar pair on
+        both speed and recall, so it becomes the single primary detector.
+        """
+        input_size = self.yolo_imgsz
+        h, w = image.shape[:2]
+        scale = min(input_size / h, input_size / w)
+        new_h, new_w = int(round(h * scale)), int(round(w * scale))
+        resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        canvas = np.zeros((input_size, input_size, 3), dtype=np.uint8)
+        canvas[:new_h, :new_w] = resized
+
+        # SCRFD preprocessing: BGR -> RGB, (x - 127.5) / 128, NCHW
+        blob = cv2.dnn.blobFromImage(
+            canvas, 1.0 / 128.0, (input_size, input_size),
+            (127.5, 127.5, 127.5), swapRB=True
         )
-        
-        detected = face_cascade.detectMultiScale(
+
+        input_name = self._scrfd_session.get_inputs()[0].name
+        outputs = self._scrfd_session.run(None, {input_name: blob})
+
+        # SCRFD emits per-stride heads: scores (N,1), bbox distances (N,4)
+        # and optionally 5-point keypoints (N,10), for strides 8/16/32
+        # with 2 anchors per cell
+        strides = (8, 16, 32)
+        num_levels = len(strides)
+        with_kps = len(outputs) >= num_levels * 3
+
+        all_boxes, all_scores, all_kps = [], [], []
+        for level, stride in enumerate(strides):
+            scores = outputs[level].reshape(-1)
+            bbox_preds = outputs[level + num_levels].reshape(-1, 4) * stride
+            kps_preds = None
+            if with_kps:
+                kps_preds = outputs[level + num_levels * 2].reshape(-1, 10) * stride
+
+            grid = input_size // stride
+            # Anchor centers: each cell hosts 2 anchors at the same point
+            xv, yv = np.meshgrid(np.arange(grid), np.arange(grid))
+            centers = np.stack([xv, yv], axis=-1).reshape(-1, 2) * stride
+            centers = np.repeat(centers, 2, axis=0).astype(np.float32)
+
+            keep = scores >= 0.5
+            if not keep.any():
+                continue
+            centers_k = centers[keep]
+            dist = bbox_preds[keep]
+            # distance2bbox: predictions are offsets from the anchor center
+            x1y1 = centers_k - dist[:, :2]
+            x2y2 = centers_k + dist[:, 2:]
+            all_boxes.append(np.hstack([x1y1, x2y2]))
+            all_scores.append(scores[keep])
+            if kps_preds is not None:
+                kps = kps_preds[keep].reshape(-1, 5, 2) + centers_k[:, None, :]
+                all_kps.append(kps)
+
+        faces = []
+        if all_boxes:
+            boxes = np.vstack(all_boxes) / scale
+            scores = np.concatenate(all_scores)
+            kps = np.vstack(all_kps) / scale if all_kps else None
+            xywh = np.hstack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]])
+            indices = cv2.dnn.NMSBoxes(
+                xywh.tolist(), scores.tolist(), 0.5, 0.45
+            )
+            for idx in np.asarray(indices).flatten():
+                face = {
+                    'bbox': tuple(int(v) for v in boxes[idx]),
+                    'confidence': float(scores[idx])
+                }
+                if kps is not None:
+                    face['landmarks'] = kps[idx].astype(np.float32)
+                faces.append(face)
+
+        if not faces and self.enable_haar_fallback:
+            faces = self._detect_faces_fallback(image, gray=gray)
+
+        return faces
+
+    def _detect_faces_fallback(self, image: np.ndarray,
+                               gray: Optional[np.ndarray] = None) -> list:
+        """
+        Fallback face detection using OpenCV Haar cascades.
+        Reuses a precomputed grayscale image when available.
+        """
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        # Haar cost scales with pixel count; 480px on the long side is
+        # plenty for a frontal-face fallback
+        scale = min(1.0, 480 / max(gray.shape))
+        if scale < 1.0:
+            gray = cv2.resize(
+                gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+
+        detected = self._face_cascade.detectMultiScale(
             gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
         )
-        
+
         faces = []
         for (x, y, w, h) in detected:
+            x, y, w, h = (int(v / scale) for v in (x, y, w, h))
             faces.append({
                 'bbox': (x, y, x + w, y + h),
                 'confidence': 0.8  # Default confidence for Haar cascade
             })
-        
+
         return faces
     
-    def _crop_face(self, image: np.ndarray, bbox: Tuple[int, int, int, int], 
+    def _align_face(self, image: np.ndarray,
+                    landmarks: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Warp the face to the canonical ArcFace pose via a similarity
+        transform from its 5 landmarks to the InsightFace template.
+        ArcFace is trained on landmark-aligned 112x112 crops, so this
+        improves embedding quality at no extra model cost - and the
+        output needs no further resize before embedding.
+        """
+        pts = np.asarray(landmarks, dtype=np.float32)[:5]
+        matrix, _ = cv2.estimateAffinePartial2D(pts, self.ARCFACE_TEMPLATE)
+        if matrix is None:
+            return None
+        return cv2.warpAffine(image, matrix, (112, 112), borderValue=0.0)
+
+    def _prepare_face(self, image: np.ndarray, face: dict,
+                      padding: float = 0.2) -> np.ndarray:
+        """
+        Produce the crop handed to ArcFace: landmark-aligned when the
+        detector supplied landmarks, padded bounding-box crop otherwise.
+        """
+        landmarks = face.get('landmarks')
+        if landmarks is not None:
+            aligned = self._align_face(image, landmarks)
+            if aligned is not None:
+                return aligned
+        return self._crop_face(image, face['bbox'], padding=padding)
+
+    def _crop_face(self, image: np.ndarray, bbox: Tuple[int, int, int, int],
                    padding: float = 0.2) -> np.ndarray:
         """
         Crop face region from image with padding.
@@ -140,93 +820,208 @@ class FaceVerifier:
         y1 = max(0, y1 - pad_h)
         x2 = min(w, x2 + pad_w)
         y2 = min(h, y2 + pad_h)
-        
-        return image[y1:y2, x1:x2]
+
+        # Contiguous copy so downstream preprocessing doesn't re-copy the
+        # strided view internally
+        return np.ascontiguousarray(image[y1:y2, x1:x2])
     
-    def _check_image_quality(self, image: np.ndarray) -> Tuple[bool, str]:
+    def _check_image_quality(self, image: np.ndarray) -> Tuple[bool, str, Optional[np.ndarray]]:
         """
         Check if image quality is sufficient for face verification.
-        
+
         Returns:
-            Tuple of (is_valid, message)
+            Tuple of (is_valid, message, grayscale image) - the grayscale
+            is handed back so the detection fallback can reuse it instead
+            of converting the same frame again.
         """
         # Check image size
         h, w = image.shape[:2]
         if h < 50 or w < 50:
-            return False, "Image too small for face detection"
-        
-        # Check for blur using Laplacian variance
+            return False, "Image too small for face detection", None
+
+        # Check for blur using Laplacian variance. Blur is scale-insensitive,
+        # so measure it on a <=256px downsample; the 16-bit Laplacian plus
+        # cv2.meanStdDev keeps the working set small and the reduction
+        # vectorized instead of materializing a float image just for .var().
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-        
+        scale = min(1.0, 256 / max(gray.shape))
+        if scale < 1.0:
+            small = cv2.resize(
+                gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+        else:
+            small = gray
+        lap = cv2.Laplacian(small, cv2.CV_16S, ksize=3)
+        _, std = cv2.meanStdDev(lap)
+        laplacian_var = float(std[0, 0]) ** 2
+
         if laplacian_var < 50:
-            return False, "Image is too blurry"
-        
-        return True, "Image quality OK"
+            return False, "Image is too blurry", gray
+
+        return True, "Image quality OK", gray
     
     def _select_best_face(self, faces: list) -> Optional[dict]:
         """Select the face with highest confidence and validate quality"""
         if not faces:
             return None
-        
-        # Filter faces by minimum confidence
-        valid_faces = [f for f in faces if f['confidence'] >= self.min_confidence]
-        if not valid_faces:
-            return None
-        
-        # Filter by minimum size
-        size_valid_faces = []
-        for face in valid_faces:
-            x1, y1, x2, y2 = face['bbox']
-            width = x2 - x1
-            height = y2 - y1
-            if width >= self.min_face_size and height >= self.min_face_size:
-                size_valid_faces.append(face)
-        
-        if not size_valid_faces:
+
+        # Single vectorized pass over [x1, y1, x2, y2, conf] instead of
+        # per-face Python filtering loops
+        boxes = np.array(
+            [[*f['bbox'], f['confidence']] for f in faces], dtype=np.float32
+        )
+        widths = boxes[:, 2] - boxes[:, 0]
+        heights = boxes[:, 3] - boxes[:, 1]
+        valid = (
+            (boxes[:, 4] >= self.min_confidence)
+            & (widths >= self.min_face_size)
+            & (heights >= self.min_face_size)
+        )
+        if not valid.any():
             return None
-        
-        return max(size_valid_faces, key=lambda x: x['confidence'])
+
+        best = int(np.argmax(np.where(valid, boxes[:, 4], -1.0)))
+        return faces[best]
     
-    def verify_faces(self, id_image_bytes: bytes, selfie_image_bytes: bytes) -> Dict[str, Any]:
+    async def verify_faces_async(self, id_image_bytes: bytes,
+                                 selfie_image_bytes: bytes) -> Dict[str, Any]:
+        """
+        Async front end for event-loop servers (FastAPI). The pipeline
+        already overlaps the independent per-image stages on the internal
+        thread pool; running it on the default executor keeps the event
+        loop responsive while OpenCV and the models hold the CPU, so
+        concurrent requests interleave instead of queuing behind one
+        another. Embeddings are routed through the event-loop micro-
+        batcher, so crops from concurrent requests coalesce into single
+        ArcFace forward passes.
+        """
+        loop = asyncio.get_running_loop()
+        batcher = self.embedding_batcher()
+
+        def _batched_embed(crops: list) -> np.ndarray:
+            # Called from the executor thread: hand each crop to the
+            # batcher on the event loop and block on the results
+            futures = [
+                asyncio.run_coroutine_threadsafe(batcher.embed(crop), loop)
+                for crop in crops
+            ]
+            return np.stack([future.result() for future in futures])
+
+        return await loop.run_in_executor(
+            None, lambda: self.verify_faces(
+                id_image_bytes, selfie_image_bytes, _embed_fn=_batched_embed
+            )
+        )
+
+    def verify_faces(self, id_image_bytes: bytes, selfie_image_bytes: bytes,
+                     _embed_fn=None) -> Dict[str, Any]:
         """
         Verify if the face in ID image matches the face in selfie.
-        
+
         Args:
             id_image_bytes: ID photo as bytes
             selfie_image_bytes: Selfie photo as bytes
-            
+            _embed_fn: Internal override for the batched embedding step
+                       (used by verify_faces_async to route crops through
+                       the micro-batcher)
+
         Returns:
             Dictionary with verification result
         """
+        # Retried attempts usually resend the identical ID image; keying
+        # embeddings by a fast content hash lets us skip the ArcFace
+        # forward pass for images we have already seen
+        id_key = hashlib.blake2b(id_image_bytes, digest_size=16).digest()
+        selfie_key = hashlib.blake2b(selfie_image_bytes, digest_size=16).digest()
+
+        # The UI sometimes re-submits the exact same pair; a full-result
+        # hit skips the entire detection + embedding pipeline. The
+        # threshold is part of the key so reconfiguring invalidates.
+        result_key = (id_key, selfie_key, self.distance_threshold)
+        if self.cache_results:
+            with self._result_lock:
+                cached = self._result_cache.get(result_key)
+                if cached is not None:
+                    self._result_cache.move_to_end(result_key)
+                    return dict(cached)
+
+        # Decode here, then drop this frame's references to the encoded
+        # buffers - holding several MB of JPEG alive through the
+        # inference phase only inflates peak RSS per in-flight request
         try:
-            # Convert images
             id_image = self._bytes_to_cv2(id_image_bytes)
             selfie_image = self._bytes_to_cv2(selfie_image_bytes)
-            
-            # Check image quality
-            id_quality, id_msg = self._check_image_quality(id_image)
-            if not id_quality:
+        except FaceVerificationError as e:
+            return {
+                "verified": False,
+                "distance": None,
+                "message": str(e),
+                "error": "verification_error"
+            }
+        except Exception as e:
+            return {
+                "verified": False,
+                "distance": None,
+                "message": f"Verification failed: {str(e)}",
+                "error": "internal_error"
+            }
+        del id_image_bytes, selfie_image_bytes
+
+        result = self._verify_faces_uncached(
+            id_image, selfie_image, id_key, selfie_key, embed_fn=_embed_fn
+        )
+
+        # Don't memoize failures - a transient error (e.g. DeepFace
+        # unavailable) would otherwise be replayed for this image pair
+        # even after the condition clears
+        if (self.cache_results
+                and result.get("error") not in ("verification_error",
+                                                "internal_error")):
+            with self._result_lock:
+                self._result_cache[result_key] = dict(result)
+                if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+
+        return result
+
+    def _verify_faces_uncached(self, id_image: np.ndarray,
+                               selfie_image: np.ndarray,
+                               id_key: bytes,
+                               selfie_key: bytes,
+                               embed_fn=None) -> Dict[str, Any]:
+        """Run detection + embedding for one pair of decoded images."""
+        try:
+            # Cheap pre-detection guard on raw dimensions only. The blur
+            # check runs later on the face crop ArcFace actually sees, so a
+            # blurry background no longer rejects a sharp face - and the
+            # Laplacian shrinks from full-frame to crop-sized.
+            if min(id_image.shape[:2]) < 50:
                 return {
                     "verified": False,
                     "distance": None,
-                    "message": f"ID image issue: {id_msg}",
+                    "message": "ID image issue: Image too small for face detection",
                     "error": "quality_check_failed"
                 }
-            
-            selfie_quality, selfie_msg = self._check_image_quality(selfie_image)
-            if not selfie_quality:
+            if min(selfie_image.shape[:2]) < 50:
                 return {
                     "verified": False,
                     "distance": None,
-                    "message": f"Selfie issue: {selfie_msg}",
+                    "message": "Selfie issue: Image too small for face detection",
                     "error": "quality_check_failed"
                 }
             
-            # Detect faces in ID image
-            print(f"[DEBUG] Detecting faces in voter ID image (size: {id_image.shape})")
-            id_faces = self._detect_faces_yolo(id_image)
-            print(f"[DEBUG] Found {len(id_faces)} face(s) in voter ID")
+            # Detect faces in both images concurrently - the two detections
+            # are independent, and the inference backends release the GIL
+            logger.debug("Detecting faces in voter ID image (size: %s)", id_image.shape)
+            logger.debug("Detecting faces in selfie (size: %s)", selfie_image.shape)
+            id_future = self._pool.submit(self._detect_faces_yolo, id_image)
+            selfie_future = self._pool.submit(
+                self._detect_faces_yolo, selfie_image
+            )
+            id_faces = id_future.result()
+            selfie_faces = selfie_future.result()
+
+            logger.debug("Found %d face(s) in voter ID", len(id_faces))
             if not id_faces:
                 return {
                     "verified": False,
@@ -234,11 +1029,8 @@ class FaceVerifier:
                     "message": "No face detected in ID image",
                     "error": "no_face_in_id"
                 }
-            
-            # Detect faces in selfie
-            print(f"[DEBUG] Detecting faces in selfie (size: {selfie_image.shape})")
-            selfie_faces = self._detect_faces_yolo(selfie_image)
-            print(f"[DEBUG] Found {len(selfie_faces)} face(s) in selfie")
+
+            logger.debug("Found %d face(s) in selfie", len(selfie_faces))
             if not selfie_faces:
                 return {
                     "verified": False,
@@ -270,7 +1062,7 @@ class FaceVerifier:
             
             # Validate face selection
             if best_id_face is None:
-                print("[DEBUG] ID face rejected: quality too low or size too small")
+                logger.debug("ID face rejected: quality too low or size too small")
                 return {
                     "verified": False,
                     "distance": None,
@@ -279,7 +1071,7 @@ class FaceVerifier:
                 }
             
             if best_selfie_face is None:
-                print("[DEBUG] Selfie rejected: quality too low or size too small")
+                logger.debug("Selfie rejected: quality too low or size too small")
                 return {
                     "verified": False,
                     "distance": None,
@@ -290,72 +1082,77 @@ class FaceVerifier:
             # Log selected face details
             id_bbox = best_id_face['bbox']
             selfie_bbox = best_selfie_face['bbox']
-            print(f"[DEBUG] ID face: confidence={best_id_face['confidence']:.2f}, size={id_bbox[2]-id_bbox[0]}x{id_bbox[3]-id_bbox[1]}")
-            print(f"[DEBUG] Selfie face: confidence={best_selfie_face['confidence']:.2f}, size={selfie_bbox[2]-selfie_bbox[0]}x{selfie_bbox[3]-selfie_bbox[1]}")
-            
-            # Crop face regions with smaller padding for voter ID cards
-            id_face_crop = self._crop_face(id_image, best_id_face['bbox'], padding=0.1)
-            selfie_face_crop = self._crop_face(selfie_image, best_selfie_face['bbox'], padding=0.2)
+            logger.debug("ID face: confidence=%.2f, size=%dx%d", best_id_face['confidence'], id_bbox[2] - id_bbox[0], id_bbox[3] - id_bbox[1])
+            logger.debug("Selfie face: confidence=%.2f, size=%dx%d", best_selfie_face['confidence'], selfie_bbox[2] - selfie_bbox[0], selfie_bbox[3] - selfie_bbox[1])
             
-            # Save cropped faces to temp files for DeepFace
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as id_tmp:
-                cv2.imwrite(id_tmp.name, id_face_crop)
-                id_tmp_path = id_tmp.name
-            
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as selfie_tmp:
-                cv2.imwrite(selfie_tmp.name, selfie_face_crop)
-                selfie_tmp_path = selfie_tmp.name
-            
-            try:
-                # Import DeepFace lazily here to avoid import-time dependency
-                # issues in environments without TensorFlow.
-                if self._deepface is None:
-                    try:
-                        from deepface import DeepFace as _DeepFace
-                        self._deepface = _DeepFace
-                    except Exception as e:
-                        raise FaceVerificationError(
-                            f"DeepFace/TensorFlow is not available: {e}"
-                        )
-
-                # Compare faces using DeepFace with ArcFace model
-                result = self._deepface.verify(
-                    img1_path=id_tmp_path,
-                    img2_path=selfie_tmp_path,
-                    model_name="ArcFace",
-                    detector_backend="skip",  # We already detected and cropped faces
-                    enforce_detection=False,
-                    distance_metric="cosine"
-                )
-                
-                distance = result.get('distance', 1.0)
-                is_verified = distance < self.distance_threshold
-                
-                # Log verification details
-                print(f"\n[VERIFICATION] Distance: {distance:.4f}, Threshold: {self.distance_threshold}")
-                print(f"[VERIFICATION] ID Confidence: {best_id_face['confidence']:.4f}")
-                print(f"[VERIFICATION] Selfie Confidence: {best_selfie_face['confidence']:.4f}")
-                print(f"[VERIFICATION] Result: {'VERIFIED' if is_verified else 'REJECTED'}\n")
-                
-                if is_verified:
-                    message = f"Face verified successfully (similarity: {(1-distance)*100:.1f}%)"
-                else:
-                    message = f"Face verification failed. Faces do not match (similarity: {(1-distance)*100:.1f}%)"
-                
+            # Align faces when landmarks are available; otherwise crop with
+            # smaller padding for voter ID cards
+            id_face_crop = self._prepare_face(id_image, best_id_face, padding=0.1)
+            selfie_face_crop = self._prepare_face(selfie_image, best_selfie_face, padding=0.2)
+
+            # Blur check on the crops that ArcFace will embed
+            id_quality, id_msg, _ = self._check_image_quality(id_face_crop)
+            if not id_quality:
                 return {
-                    "verified": is_verified,
-                    "distance": round(distance, 4),
-                    "message": message,
-                    "id_face_confidence": round(best_id_face['confidence'], 4),
-                    "selfie_face_confidence": round(best_selfie_face['confidence'], 4),
-                    "similarity_percentage": round((1 - distance) * 100, 2)
+                    "verified": False,
+                    "distance": None,
+                    "message": f"ID image issue: {id_msg}",
+                    "error": "quality_check_failed"
                 }
-                
-            finally:
-                # Clean up temp files
-                os.unlink(id_tmp_path)
-                os.unlink(selfie_tmp_path)
-                
+            selfie_quality, selfie_msg, _ = self._check_image_quality(selfie_face_crop)
+            if not selfie_quality:
+                return {
+                    "verified": False,
+                    "distance": None,
+                    "message": f"Selfie issue: {selfie_msg}",
+                    "error": "quality_check_failed"
+                }
+            
+            # Compare faces with the cached ArcFace model - embeddings are
+            # computed on the numpy crops directly (no temp files, no
+            # repeated model construction)
+            self._ensure_arcface()
+            id_embedding = self._cached_embedding(id_key)
+            selfie_embedding = self._cached_embedding(selfie_key)
+
+            pending = []
+            if id_embedding is None:
+                pending.append((id_key, id_face_crop))
+            if selfie_embedding is None:
+                pending.append((selfie_key, selfie_face_crop))
+            if pending:
+                embed = embed_fn if embed_fn is not None else self._embed_faces
+                embeddings = embed([crop for _, crop in pending])
+                for (key, _), embedding in zip(pending, embeddings):
+                    self._store_embedding(key, embedding)
+                    if key == id_key:
+                        id_embedding = embedding
+                    if key == selfie_key:
+                        selfie_embedding = embedding
+
+            distance = float(_cosine_distance(id_embedding, selfie_embedding))
+            is_verified = distance < self.distance_threshold
+
+            # Log verification details
+            logger.debug("Verification distance: %.4f, threshold: %s", distance, self.distance_threshold)
+            logger.debug("ID confidence: %.4f", best_id_face['confidence'])
+            logger.debug("Selfie confidence: %.4f", best_selfie_face['confidence'])
+            logger.debug("Result: %s", 'VERIFIED' if is_verified else 'REJECTED')
+
+            if is_verified:
+                message = f"Face verified successfully (similarity: {(1-distance)*100:.1f}%)"
+            else:
+                message = f"Face verification failed. Faces do not match (similarity: {(1-distance)*100:.1f}%)"
+
+            return {
+                "verified": is_verified,
+                "distance": round(distance, 4),
+                "message": message,
+                "id_face_confidence": round(best_id_face['confidence'], 4),
+                "selfie_face_confidence": round(best_selfie_face['confidence'], 4),
+                "similarity_percentage": round((1 - distance) * 100, 2)
+            }
+
         except FaceVerificationError as e:
             return {
                 "verified": False,
@@ -372,15 +1169,102 @@ class FaceVerifier:
             }
 
 
+def quantize_onnx_model(model_path: str, output_path: str) -> str:
+    """
+    Quantize an exported ONNX model to int8 weights (dynamic quantization).
+    Run once offline, e.g.:
+        quantize_onnx_model('arcface.onnx', 'arcface.int8.onnx')
+    The verifier picks up the .int8.onnx file automatically.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+
+def export_arcface_onnx(output_path: str = FaceVerifier.ARCFACE_ONNX_PATH) -> str:
+    """
+    One-time offline export of DeepFace's ArcFace Keras model to ONNX.
+    The exported graph feeds the ONNX Runtime fast path in FaceVerifier.
+    """
+    import tf2onnx
+    from deepface import DeepFace
+    arcface = DeepFace.build_model("ArcFace")
+    model = getattr(arcface, 'model', arcface)
+    tf2onnx.convert.from_keras(model, output_path=output_path)
+    return output_path
+
+
+def quantize_onnx_model_static(model_path: str, output_path: str,
+                               calibration_crops: list) -> str:
+    """
+    Static int8 quantization with per-tensor activation ranges calibrated
+    on real face crops - tighter than dynamic quantization for conv-heavy
+    graphs like ArcFace. Run once offline with a few dozen 112x112 BGR
+    crops:
+        quantize_onnx_model_static('arcface.onnx', 'arcface.int8.onnx', crops)
+    """
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantType, quantize_static
+    )
+
+    session = ort.InferenceSession(model_path,
+                                   providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+
+    blob = cv2.dnn.blobFromImages(
+        calibration_crops, scalefactor=1.0 / 127.5, size=(112, 112),
+        mean=(127.5, 127.5, 127.5), swapRB=True, crop=False
+    )
+    batch = np.ascontiguousarray(blob.transpose(0, 2, 3, 1))
+
+    class _CropReader(CalibrationDataReader):
+        def __init__(self):
+            self._it = iter(batch)
+
+        def get_next(self):
+            sample = next(self._it, None)
+            if sample is None:
+                return None
+            return {input_name: sample[None]}
+
+    quantize_static(model_path, output_path, _CropReader(),
+                    weight_type=QuantType.QInt8)
+    return output_path
+
+
 # Global instance for reuse
 _verifier_instance: Optional[FaceVerifier] = None
+_verifier_lock = threading.Lock()
+
+
+def _reset_verifier_after_fork():
+    """
+    Drop the singleton in forked children. Gunicorn-style workers must
+    each build their own verifier rather than inherit model handles (and
+    a potential CUDA context) from the parent process.
+    """
+    global _verifier_instance
+    _verifier_instance = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_verifier_after_fork)
 
 
 def get_verifier(distance_threshold: float = 0.45) -> FaceVerifier:
-    """Get or create the face verifier singleton"""
+    """
+    Get or create the face verifier singleton.
+
+    Double-checked locking: a first-request burst otherwise races several
+    threads into constructing the ~500MB model stack multiple times.
+    """
     global _verifier_instance
     if _verifier_instance is None:
-        _verifier_instance = FaceVerifier(distance_threshold=distance_threshold)
+        with _verifier_lock:
+            if _verifier_instance is None:
+                _verifier_instance = FaceVerifier(
+                    distance_threshold=distance_threshold
+                )
     return _verifier_instance
 
 
@@ -5,16 +5,76 @@ State-of-the-art accuracy with simple implementation
 
 import cv2
 import numpy as np
+import logging
 from typing import Tuple, Optional, Dict, Any
-import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    # ONNX Runtime is optional - DeepFace is used instead
+    ort = None
+
+try:
+    # Direct BLAS sdot skips NumPy's dispatch overhead on the tiny
+    # 512-float dot product; embeddings are float32 throughout
+    from scipy.linalg.blas import sdot as _sdot
+except ImportError:
+    # SciPy is optional - np.dot is used instead
+    _sdot = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _TJ = TurboJPEG()
+except Exception:
+    # PyTurboJPEG is optional (and needs libturbojpeg installed) -
+    # cv2.imdecode is used instead
+    _TJ = None
+
+
+
+# InsightFace's canonical 5-point layout (eyes, nose tip, mouth corners)
+# on the 112x112 ArcFace input - targets for the alignment warp
+_ARCFACE_5PTS = np.array([
+    [38.2946, 51.6963],
+    [73.5318, 51.5014],
+    [56.0252, 71.7366],
+    [41.5493, 92.3655],
+    [70.7299, 92.2041],
+], dtype=np.float32)
 
 class HuggingFaceFaceVerifier:
     """
     Face verification using DeepFace with ArcFace model.
     99.8%+ accuracy - industry standard for face recognition.
+
+    When an exported ArcFace ONNX model is present, embeddings come from
+    an ONNX Runtime session instead - same weights, but ORT's fused
+    Conv/PRelu kernels skip the TensorFlow/Keras per-call overhead that
+    dominates the DeepFace path.
     """
-    
+
+    # ResNet100 ArcFace export (e.g. arcfaceresnet100-8 from the ONNX
+    # model zoo). Takes (N, 3, 112, 112) float32, returns (N, 512).
+    ARCFACE_ONNX_PATH = 'arcfaceresnet100-8.onnx'
+    # Dynamically quantized int8 variant - quarter the weight bytes and
+    # VNNI int8 dot products on recent CPUs, with <0.3% cosine drift.
+    # Produced offline with the quantization helpers in
+    # face_verification.py (or optimum's ORTQuantizer). Set
+    # BALLOT_ARCFACE_FP32=1 to force the FP32 model.
+    ARCFACE_INT8_PATH = 'arcface_int8/model.onnx'
+    # InsightFace SCRFD detector with 5-point keypoints - ~1.5ms per
+    # image at 320px on CPU and far better recall than the Haar cascade
+    SCRFD_ONNX_PATH = 'scrfd_500m_bnkps.onnx'
+    SCRFD_INPUT_SIZE = 320
+
     def __init__(self, threshold: float = 0.25):
         """
         Initialize face verifier using DeepFace.
@@ -28,16 +88,111 @@ class HuggingFaceFaceVerifier:
         self.threshold = threshold
         self.min_face_size = 60
         self._deepface = None
+        self._ort_session = None
+        self._scrfd_session = None
+        self._face_cascade = None
+        # Content-hash -> (embedding, face_info) LRU. Retries and
+        # multi-step voter flows resubmit the same ID bytes, and the
+        # embedding is deterministic for identical input.
+        self._emb_cache: 'OrderedDict[bytes, tuple]' = OrderedDict()
+        self._emb_lock = threading.Lock()
+        # Reusable per-thread preprocessing buffers (the two embedding
+        # extractions run concurrently, so they cannot share one set)
+        self._tls = threading.local()
         self._load_models()
-    
+
+    EMB_CACHE_SIZE = 512
+
+    def _embedding_for(self, image_bytes: bytes) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """Cached wrapper around _get_face_embedding, keyed on content"""
+        # blake2b is ~3x faster than sha256 on these small-ish blobs
+        key = hashlib.blake2b(image_bytes, digest_size=16).digest()
+        with self._emb_lock:
+            hit = self._emb_cache.get(key)
+            if hit is not None:
+                self._emb_cache.move_to_end(key)
+                return hit
+
+        # Decode only on a miss - a cache hit never touches the pixels
+        embedding, face_info = self._get_face_embedding(
+            self._bytes_to_cv2(image_bytes))
+        if embedding is not None:
+            with self._emb_lock:
+                self._emb_cache[key] = (embedding, face_info)
+                self._emb_cache.move_to_end(key)
+                while len(self._emb_cache) > self.EMB_CACHE_SIZE:
+                    self._emb_cache.popitem(last=False)
+        return embedding, face_info
+
     def _load_models(self):
-        """Load DeepFace with ArcFace model"""
+        """Load the ArcFace ONNX session, or DeepFace as fallback"""
+        model_path = None
+        if ort is not None:
+            # Prefer the int8 model unless FP32 is forced
+            if (os.path.exists(self.ARCFACE_INT8_PATH)
+                    and not os.getenv('BALLOT_ARCFACE_FP32')):
+                model_path = self.ARCFACE_INT8_PATH
+            elif os.path.exists(self.ARCFACE_ONNX_PATH):
+                model_path = self.ARCFACE_ONNX_PATH
+
+        if model_path is not None:
+            try:
+                opts = ort.SessionOptions()
+                opts.graph_optimization_level = \
+                    ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                # HEURISTIC skips cuDNN's exhaustive per-shape algorithm
+                # search; the arena strategy stops the CUDA allocator
+                # from greedily growing past what inference needs
+                providers = [
+                    ('CUDAExecutionProvider', {
+                        'device_id': 0,
+                        'cudnn_conv_algo_search': 'HEURISTIC',
+                        'arena_extend_strategy': 'kSameAsRequested',
+                    }),
+                    'CPUExecutionProvider',
+                ]
+                self._ort_session = ort.InferenceSession(
+                    model_path,
+                    sess_options=opts,
+                    providers=providers
+                )
+                # Two dummy forwards at startup: the first triggers lazy
+                # provider setup and cuDNN algorithm selection, the
+                # second confirms steady state - so no voter pays the
+                # first-call tax
+                dummy = np.zeros((1, 3, 112, 112), np.float32)
+                input_name = self._ort_session.get_inputs()[0].name
+                for _ in range(2):
+                    self._ort_session.run(None, {input_name: dummy})
+                # Detection for the ONNX path: SCRFD with landmark-based
+                # alignment when its model is on disk, else the same
+                # opencv backend DeepFace was configured with
+                if os.path.exists(self.SCRFD_ONNX_PATH):
+                    self._scrfd_session = ort.InferenceSession(
+                        self.SCRFD_ONNX_PATH,
+                        sess_options=opts,
+                        providers=providers
+                    )
+                    det_dummy = np.zeros(
+                        (1, 3, self.SCRFD_INPUT_SIZE, self.SCRFD_INPUT_SIZE),
+                        np.float32)
+                    det_name = self._scrfd_session.get_inputs()[0].name
+                    self._scrfd_session.run(None, {det_name: det_dummy})
+                self._face_cascade = cv2.CascadeClassifier(
+                    cv2.data.haarcascades
+                    + 'haarcascade_frontalface_default.xml'
+                )
+                log.info("ArcFace ONNX session loaded (%s)", model_path)
+                return
+            except Exception as e:
+                log.warning("ArcFace ONNX load failed (%s), using DeepFace", e)
+
         try:
             from deepface import DeepFace
             self._deepface = DeepFace
-            
-            print("✓ DeepFace with ArcFace model loaded successfully")
-            
+
+            log.info("DeepFace with ArcFace model loaded successfully")
+
         except ImportError:
             raise Exception(
                 "DeepFace not installed. Install with: pip install deepface"
@@ -47,24 +202,268 @@ class HuggingFaceFaceVerifier:
     
     def _bytes_to_cv2(self, image_bytes: bytes) -> np.ndarray:
         """Convert image bytes to OpenCV format"""
+        # JPEG magic: FF D8. Phone JPEGs (often 3000x4000) decode
+        # through libjpeg-turbo's scaled IDCT when PyTurboJPEG is
+        # installed - 1/4 scale for multi-MB shots skips ~16x the decode
+        # work, and the 112x112 ArcFace input loses nothing. PNG/WebP
+        # fall through to cv2.imdecode.
+        if _TJ is not None and image_bytes[:2] == b'\xff\xd8':
+            try:
+                if len(image_bytes) > 2_000_000:
+                    scale = (1, 4)
+                elif len(image_bytes) > 500_000:
+                    scale = (1, 2)
+                else:
+                    scale = (1, 1)
+                img = _TJ.decode(image_bytes, pixel_format=TJPF_BGR,
+                                 scaling_factor=scale)
+                if min(img.shape[:2]) < self.min_face_size * 4 and scale != (1, 1):
+                    img = _TJ.decode(image_bytes, pixel_format=TJPF_BGR)
+                return img
+            except Exception:
+                pass  # Corrupt or unusual JPEG - let OpenCV try
+
         nparr = np.frombuffer(image_bytes, np.uint8)
         img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         if img is None:
             raise Exception("Failed to decode image")
         return img
     
-    def _get_face_embedding(self, image_path: str) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+    def _arcface_blob(self, crop: np.ndarray) -> np.ndarray:
         """
-        Extract face embedding from image using DeepFace.
-        
+        Normalize a 112x112 BGR crop into the session's NCHW RGB input,
+        writing into thread-local buffers - zero allocations per call
+        on the hot path.
+        """
+        tls = self._tls
+        blob = getattr(tls, 'blob', None)
+        if blob is None:
+            blob = np.empty((1, 3, 112, 112), np.float32)
+            tls.blob = blob
+            tls.f32 = np.empty((112, 112, 3), np.float32)
+        np.subtract(crop, 127.5, out=tls.f32, casting='unsafe')
+        tls.f32 *= 1.0 / 128.0
+        # ArcFace was trained on RGB; the crop is OpenCV BGR, so reverse
+        # the channel axis while transposing to NCHW
+        np.copyto(blob[0], tls.f32[:, :, ::-1].transpose(2, 0, 1))
+        return blob
+
+    def _detect_scrfd(self, image: np.ndarray):
+        """
+        Detect the largest face with SCRFD. Returns (bbox, score,
+        landmarks) with landmarks as a (5, 2) float32 array, or None.
+        """
+        input_size = self.SCRFD_INPUT_SIZE
+        h, w = image.shape[:2]
+        scale = min(input_size / h, input_size / w)
+        new_h, new_w = int(round(h * scale)), int(round(w * scale))
+        resized = cv2.resize(image, (new_w, new_h),
+                             interpolation=cv2.INTER_LINEAR)
+        canvas = np.zeros((input_size, input_size, 3), dtype=np.uint8)
+        canvas[:new_h, :new_w] = resized
+
+        # SCRFD preprocessing: BGR -> RGB, (x - 127.5) / 128, NCHW
+        blob = cv2.dnn.blobFromImage(
+            canvas, 1.0 / 128.0, (input_size, input_size),
+            (127.5, 127.5, 127.5), swapRB=True
+        )
+        input_name = self._scrfd_session.get_inputs()[0].name
+        outputs = self._scrfd_session.run(None, {input_name: blob})
+
+        # Per-stride heads: scores (N,1), bbox distances (N,4) and
+        # 5-point keypoints (N,10), strides 8/16/32, 2 anchors per cell
+        strides = (8, 16, 32)
+        num_levels = len(strides)
+        all_boxes, all_scores, all_kps = [], [], []
+        for level, stride in enumerate(strides):
+            scores = outputs[level].reshape(-1)
+            bbox_preds = outputs[level + num_levels].reshape(-1, 4) * stride
+            kps_preds = outputs[level + num_levels * 2].reshape(-1, 10) * stride
+
+            grid = input_size // stride
+            xv, yv = np.meshgrid(np.arange(grid), np.arange(grid))
+            centers = np.stack([xv, yv], axis=-1).reshape(-1, 2) * stride
+            centers = np.repeat(centers, 2, axis=0).astype(np.float32)
+
+            keep = scores >= 0.5
+            if not keep.any():
+                continue
+            centers_k = centers[keep]
+            dist = bbox_preds[keep]
+            # distance2bbox: offsets from the anchor center
+            all_boxes.append(np.hstack([centers_k - dist[:, :2],
+                                        centers_k + dist[:, 2:]]))
+            all_scores.append(scores[keep])
+            all_kps.append(kps_preds[keep].reshape(-1, 5, 2)
+                           + centers_k[:, None, :])
+
+        if not all_boxes:
+            return None
+        boxes = np.vstack(all_boxes) / scale
+        scores = np.concatenate(all_scores)
+        kps = np.vstack(all_kps) / scale
+        xywh = np.hstack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]])
+        indices = cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), 0.5, 0.45)
+        indices = np.asarray(indices).flatten()
+        if indices.size == 0:
+            return None
+
+        # Largest surviving face is the subject
+        areas = ((boxes[indices, 2] - boxes[indices, 0])
+                 * (boxes[indices, 3] - boxes[indices, 1]))
+        best = indices[int(np.argmax(areas))]
+        bbox = tuple(int(v) for v in boxes[best])
+        return bbox, float(scores[best]), kps[best].astype(np.float32)
+
+    def _align_face_onnx(self, image: np.ndarray) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """
+        Detect and align the subject face for the ONNX session.
+
+        Returns:
+            Tuple of (112x112 BGR crop or None, face_info)
+        """
+        if self._scrfd_session is not None:
+            det = self._detect_scrfd(image)
+            if det is None:
+                return None, {"error": "No face detected"}
+            (x1, y1, x2, y2), score, landmarks = det
+            w, h = x2 - x1, y2 - y1
+            if w < self.min_face_size or h < self.min_face_size:
+                return None, {
+                    "error": f"Face too small: {w}x{h} (min: {self.min_face_size}x{self.min_face_size})"
+                }
+            # Similarity warp from detected landmarks straight to the
+            # canonical 112x112 ArcFace layout - crop, scale and
+            # rotation in one pass
+            M, _ = cv2.estimateAffinePartial2D(
+                landmarks, _ARCFACE_5PTS, method=cv2.LMEDS
+            )
+            crop = cv2.warpAffine(image, M, (112, 112))
+            return crop, {
+                "bbox": [x1, y1, x2, y2],
+                "confidence": score,
+                "face_size": (int(w), int(h))
+            }
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self._face_cascade.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=5,
+            minSize=(self.min_face_size, self.min_face_size)
+        )
+        if len(faces) == 0:
+            return None, {"error": "No face detected"}
+
+        # Largest face is the subject (matches the DeepFace path)
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        if w < self.min_face_size or h < self.min_face_size:
+            return None, {
+                "error": f"Face too small: {w}x{h} (min: {self.min_face_size}x{self.min_face_size})"
+            }
+
+        crop = image[y:y + h, x:x + w]
+        crop = cv2.resize(crop, (112, 112), interpolation=cv2.INTER_AREA)
+        return crop, {
+            "bbox": [int(x), int(y), int(x + w), int(y + h)],
+            "confidence": 0.9,  # Haar gives no score; matches old default
+            "face_size": (int(w), int(h))
+        }
+
+    def _embed_onnx(self, image: np.ndarray) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """
+        Extract face embedding through the ONNX Runtime session.
+
+        Returns:
+            Tuple of (embedding, face_info)
+        """
+        crop, face_info = self._align_face_onnx(image)
+        if crop is None:
+            return None, face_info
+
+        blob = self._arcface_blob(crop)
+        input_name = self._ort_session.get_inputs()[0].name
+        embedding = self._ort_session.run(None, {input_name: blob})[0].ravel()
+        embedding /= np.linalg.norm(embedding) + 1e-12
+        face_info["embedding_dim"] = int(embedding.shape[0])
+        return embedding, face_info
+
+    def _pair_embeddings(self, id_image_bytes: bytes,
+                         selfie_image_bytes: bytes) -> tuple:
+        """
+        Embeddings for the ID/selfie pair. On the ONNX path the two
+        faces are stacked into one (2, 3, 112, 112) batch and run
+        through a single forward pass - half the Python/ORT call
+        overhead and one weight sweep for both. The DeepFace path keeps
+        the two-thread overlap instead.
+
+        Returns:
+            (id_embedding, id_info, selfie_embedding, selfie_info)
+        """
+        if self._ort_session is None:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                id_future = executor.submit(
+                    self._embedding_for, id_image_bytes)
+                selfie_future = executor.submit(
+                    self._embedding_for, selfie_image_bytes)
+                id_embedding, id_info = id_future.result()
+                selfie_embedding, selfie_info = selfie_future.result()
+            return id_embedding, id_info, selfie_embedding, selfie_info
+
+        results = [None, None]  # (embedding, face_info) per image
+        pending = []            # (slot, cache key, aligned crop)
+        for slot, raw in enumerate([id_image_bytes, selfie_image_bytes]):
+            key = hashlib.blake2b(raw, digest_size=16).digest()
+            with self._emb_lock:
+                hit = self._emb_cache.get(key)
+                if hit is not None:
+                    self._emb_cache.move_to_end(key)
+            if hit is not None:
+                results[slot] = hit
+                continue
+            # Decode only on a miss - retries of identical bytes skip
+            # the imdecode entirely
+            crop, face_info = self._align_face_onnx(
+                self._bytes_to_cv2(raw))
+            if crop is None:
+                results[slot] = (None, face_info)
+                continue
+            pending.append((slot, key, crop, face_info))
+
+        if pending:
+            batch = np.empty((len(pending), 3, 112, 112), np.float32)
+            for i, (_, _, crop, _) in enumerate(pending):
+                np.copyto(batch[i:i + 1], self._arcface_blob(crop))
+            input_name = self._ort_session.get_inputs()[0].name
+            embeddings = self._ort_session.run(None, {input_name: batch})[0]
+            for i, (slot, key, _, face_info) in enumerate(pending):
+                embedding = embeddings[i].ravel()
+                embedding /= np.linalg.norm(embedding) + 1e-12
+                face_info["embedding_dim"] = int(embedding.shape[0])
+                results[slot] = (embedding, face_info)
+                with self._emb_lock:
+                    self._emb_cache[key] = results[slot]
+                    self._emb_cache.move_to_end(key)
+                    while len(self._emb_cache) > self.EMB_CACHE_SIZE:
+                        self._emb_cache.popitem(last=False)
+
+        return results[0][0], results[0][1], results[1][0], results[1][1]
+
+    def _get_face_embedding(self, image_bgr: np.ndarray) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """
+        Extract face embedding from a decoded BGR image using the ONNX
+        session when available, or DeepFace otherwise.
+
         Returns:
             Tuple of (embedding, face_info)
         """
         try:
+            if self._ort_session is not None:
+                return self._embed_onnx(image_bgr)
+
             # Use DeepFace to extract embedding with ArcFace model
             # detector_backend='opencv' is more reliable for voter IDs (less false positives)
+            # DeepFace accepts the ndarray directly - no file round-trip
             embedding_objs = self._deepface.represent(
-                img_path=image_path,
+                img_path=image_bgr,
                 model_name='ArcFace',
                 detector_backend='opencv',  # Changed from 'retinaface' - less sensitive
                 enforce_detection=True,
@@ -76,7 +475,8 @@ class HuggingFaceFaceVerifier:
             
             # If multiple faces detected, select the largest one (most likely the main face)
             if len(embedding_objs) > 1:
-                print(f"  [INFO] Multiple faces detected ({len(embedding_objs)}), selecting largest face")
+                log.debug("Multiple faces detected (%d), selecting largest",
+                          len(embedding_objs))
                 # Sort by face area (width * height) and take the largest
                 embedding_objs = sorted(
                     embedding_objs,
@@ -86,7 +486,8 @@ class HuggingFaceFaceVerifier:
             
             # Get the embedding and face region (largest face if multiple)
             result = embedding_objs[0]
-            embedding = np.array(result['embedding'])
+            embedding = np.asarray(result['embedding'], dtype=np.float32)
+            embedding /= np.linalg.norm(embedding) + 1e-12
             face_region = result.get('facial_area', {})
             
             # Calculate face size
@@ -133,103 +534,75 @@ class HuggingFaceFaceVerifier:
             Verification result with similarity score
         """
         try:
-            print(f"\n{'='*70}")
-            print("DEEPFACE FACE VERIFICATION - ArcFace Model")
-            print(f"{'='*70}\n")
+            # %-style args defer the formatting cost to when DEBUG is
+            # actually enabled; under load these lines would otherwise
+            # serialize concurrent requests on the stdout lock. Encoded
+            # sizes only - decoding is deferred to the embedding step,
+            # which skips it entirely on cache hits.
+            log.debug("processing id=%dB selfie=%dB",
+                      len(id_image_bytes), len(selfie_image_bytes))
+            id_embedding, id_info, selfie_embedding, selfie_info = \
+                self._pair_embeddings(id_image_bytes, selfie_image_bytes)
+
+            if id_embedding is None:
+                return {
+                    "verified": False,
+                    "message": f"ID image: {id_info['error']}",
+                    "error": "id_face_error",
+                    "similarity": None
+                }
+
+            log.debug("id face conf=%.3f size=%dx%d", id_info['confidence'],
+                      id_info['face_size'][0], id_info['face_size'][1])
+
+            if selfie_embedding is None:
+                return {
+                    "verified": False,
+                    "message": f"Selfie: {selfie_info['error']}",
+                    "error": "selfie_face_error",
+                    "similarity": None
+                }
             
-            # Convert images and save to temp files (DeepFace needs file paths)
-            id_image = self._bytes_to_cv2(id_image_bytes)
-            selfie_image = self._bytes_to_cv2(selfie_image_bytes)
+            log.debug("selfie face conf=%.3f size=%dx%d",
+                      selfie_info['confidence'],
+                      selfie_info['face_size'][0], selfie_info['face_size'][1])
+
+            # Embeddings are stored unit-length, so cosine similarity
+            # collapses to a single dot product
+            if _sdot is not None:
+                similarity = float(_sdot(id_embedding, selfie_embedding))
+            else:
+                similarity = float(np.dot(id_embedding, selfie_embedding))
             
-            # Save to temp files
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as id_tmp:
-                cv2.imwrite(id_tmp.name, id_image)
-                id_tmp_path = id_tmp.name
+            # Convert to distance for consistency
+            distance = 1.0 - similarity
             
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as selfie_tmp:
-                cv2.imwrite(selfie_tmp.name, selfie_image)
-                selfie_tmp_path = selfie_tmp.name
+            # Verify
+            is_verified = distance < self.threshold
             
-            try:
-                print(f"[1/3] Processing ID image ({id_image.shape[1]}x{id_image.shape[0]})...")
-                id_embedding, id_info = self._get_face_embedding(id_tmp_path)
-                
-                if id_embedding is None:
-                    return {
-                        "verified": False,
-                        "message": f"ID image: {id_info['error']}",
-                        "error": "id_face_error",
-                        "similarity": None
-                    }
-                
-                print(f"  ✓ Face detected (confidence: {id_info['confidence']:.3f}, size: {id_info['face_size'][0]}x{id_info['face_size'][1]})")
-                
-                print(f"\n[2/3] Processing selfie image ({selfie_image.shape[1]}x{selfie_image.shape[0]})...")
-                selfie_embedding, selfie_info = self._get_face_embedding(selfie_tmp_path)
-                
-                if selfie_embedding is None:
-                    return {
-                        "verified": False,
-                        "message": f"Selfie: {selfie_info['error']}",
-                        "error": "selfie_face_error",
-                        "similarity": None
-                    }
-                
-                print(f"  ✓ Face detected (confidence: {selfie_info['confidence']:.3f}, size: {selfie_info['face_size'][0]}x{selfie_info['face_size'][1]})")
-                
-                # Calculate cosine similarity
-                print(f"\n[3/3] Comparing faces...")
-                
-                # Normalize embeddings
-                id_norm = id_embedding / np.linalg.norm(id_embedding)
-                selfie_norm = selfie_embedding / np.linalg.norm(selfie_embedding)
-                
-                # Cosine similarity
-                similarity = float(np.dot(id_norm, selfie_norm))
-                
-                # Convert to distance for consistency
-                distance = 1.0 - similarity
-                
-                # Verify
-                is_verified = distance < self.threshold
-                
-                print(f"  Similarity: {similarity:.4f}")
-                print(f"  Distance: {distance:.4f}")
-                print(f"  Threshold: {self.threshold}")
-                print(f"  Result: {'✓ VERIFIED' if is_verified else '✗ REJECTED'}")
-                
-                print(f"\n{'='*70}")
-                print(f"FINAL RESULT: {'✓ MATCH' if is_verified else '✗ NO MATCH'}")
-                print(f"{'='*70}\n")
-                
-                if is_verified:
-                    message = f"✓ Face verified successfully! (similarity: {similarity*100:.1f}%)"
-                else:
-                    message = f"✗ Face verification failed. Faces do not match (similarity: {similarity*100:.1f}%)"
-                
-                return {
-                    "verified": is_verified,
-                    "message": message,
-                    "similarity": round(similarity, 4),
-                    "distance": round(distance, 4),
-                    "threshold": self.threshold,
-                    "similarity_percentage": round(similarity * 100, 2),
-                    "id_face_confidence": round(id_info['confidence'], 4),
-                    "selfie_face_confidence": round(selfie_info['confidence'], 4),
-                    "model": "DeepFace (ArcFace)",
-                    "embedding_dimension": id_info['embedding_dim']
-                }
+            log.debug("sim=%.4f dist=%.4f threshold=%s verified=%s",
+                      similarity, distance, self.threshold, is_verified)
+
+            if is_verified:
+                message = f"✓ Face verified successfully! (similarity: {similarity*100:.1f}%)"
+            else:
+                message = f"✗ Face verification failed. Faces do not match (similarity: {similarity*100:.1f}%)"
             
-            finally:
-                # Clean up temp files
-                try:
-                    os.unlink(id_tmp_path)
-                    os.unlink(selfie_tmp_path)
-                except:
-                    pass
-                
+            return {
+                "verified": is_verified,
+                "message": message,
+                "similarity": round(similarity, 4),
+                "distance": round(distance, 4),
+                "threshold": self.threshold,
+                "similarity_percentage": round(similarity * 100, 2),
+                "id_face_confidence": round(id_info['confidence'], 4),
+                "selfie_face_confidence": round(selfie_info['confidence'], 4),
+                "model": "DeepFace (ArcFace)",
+                "embedding_dimension": id_info['embedding_dim']
+            }
+
         except Exception as e:
-            print(f"\n[ERROR] Verification failed: {str(e)}")
+            log.error("Verification failed: %s", e, exc_info=True)
             return {
                 "verified": False,
                 "message": f"Verification error: {str(e)}",
@@ -241,6 +614,14 @@ class HuggingFaceFaceVerifier:
 # Global instance
 _hf_verifier: Optional[HuggingFaceFaceVerifier] = None
 
+# Full-result cache: (id hash, selfie hash, threshold) -> (timestamp,
+# result dict). Voters routinely click "verify" twice with the exact
+# same pair of images; a hit skips decoding and inference entirely.
+_RESULT_CACHE_SIZE = 1024
+_RESULT_CACHE_TTL = 600.0  # seconds
+_result_cache: 'OrderedDict[tuple, tuple]' = OrderedDict()
+_result_lock = threading.Lock()
+
 
 def get_hf_verifier(threshold: float = 0.25) -> HuggingFaceFaceVerifier:
     """Get or create HuggingFace verifier singleton"""
@@ -254,14 +635,61 @@ def verify_face_huggingface(id_image_bytes: bytes, selfie_image_bytes: bytes,
                             threshold: float = 0.25) -> Dict[str, Any]:
     """
     Verify faces using DeepFace ArcFace model.
-    
+
     Args:
         id_image_bytes: ID photo as bytes
         selfie_image_bytes: Selfie photo as bytes
         threshold: Distance threshold (0.25 = very strict, recommended)
-        
+
     Returns:
         Verification result
     """
+    key = (
+        hashlib.blake2b(id_image_bytes, digest_size=16).digest(),
+        hashlib.blake2b(selfie_image_bytes, digest_size=16).digest(),
+        threshold
+    )
+    now = time.monotonic()
+    with _result_lock:
+        hit = _result_cache.get(key)
+        if hit is not None:
+            stamp, result = hit
+            if now - stamp < _RESULT_CACHE_TTL:
+                _result_cache.move_to_end(key)
+                return result
+            del _result_cache[key]
+
     verifier = get_hf_verifier(threshold)
-    return verifier.verify_faces(id_image_bytes, selfie_image_bytes)
+    result = verifier.verify_faces(id_image_bytes, selfie_image_bytes)
+
+    # Transient failures should retry for real, so don't pin them
+    if result.get("error") != "internal_error":
+        with _result_lock:
+            _result_cache[key] = (now, result)
+            _result_cache.move_to_end(key)
+            while len(_result_cache) > _RESULT_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+    return result
+
+
+def optimize_onnx_model(model_path: str, output_path: str) -> str:
+    """
+    Offline helper: run ONNX Runtime's graph optimizer over a model and
+    save the fused result.
+
+    Folds BatchNormalization into the preceding convolutions and fuses
+    Conv+BN+PRelu groups - the unfolded BN ops in some ArcFace exports
+    multiply per-Conv cost many times over. Loading the pre-optimized
+    file also skips the same optimization work at session startup.
+
+    Usage (one-off, not on the request path):
+        python -c "from face_verification_huggingface import \
+optimize_onnx_model; optimize_onnx_model(
+            'arcfaceresnet100-8.onnx', 'arcfaceresnet100-8.opt.onnx')"
+    """
+    from onnxruntime.transformers import optimizer
+
+    optimized = optimizer.optimize_model(model_path, opt_level=99,
+                                         use_gpu=False)
+    optimized.save_model_to_file(output_path)
+    return output_path
@@ -10,9 +10,10 @@ from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 import uvicorn
 import logging
+import os
 
 # Import HuggingFace DeepFace ArcFace verification (99.8%+ accuracy)
-from face_verification_huggingface import verify_face_huggingface
+from face_verification_huggingface import verify_face_huggingface, get_hf_verifier
 
 
 # Configure logging
@@ -22,11 +23,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # noqa: F401 - only checking availability
+    from fastapi.responses import ORJSONResponse
+    _response_class = ORJSONResponse
+except ImportError:
+    # orjson is optional - stdlib json serialization is used instead
+    _response_class = JSONResponse
+
 # Create FastAPI app
 app = FastAPI(
     title="BALLOT Face Verification API",
     description="Face verification service for blockchain voting system",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes the float-heavy verification responses several
+    # times faster than stdlib json and handles numpy scalars natively
+    default_response_class=_response_class
 )
 
 # Configure CORS for Next.js frontend
@@ -44,6 +56,29 @@ app.add_middleware(
 )
 
 
+# Maximum accepted upload size (10MB per image)
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+async def read_capped(upload: UploadFile, cap: int, label: str) -> bytes:
+    """
+    Read an upload in chunks, aborting as soon as the cap is exceeded.
+
+    Reading with .read() buffers the entire body before the size check,
+    so an oversized upload costs its full size in memory first; this
+    stops at cap + one chunk.
+    """
+    buf = bytearray()
+    while chunk := await upload.read(64 * 1024):
+        buf.extend(chunk)
+        if len(buf) > cap:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{label} too large (max {cap // (1024 * 1024)}MB)"
+            )
+    return bytes(buf)
+
+
 class VerificationResponse(BaseModel):
     """Response model for HuggingFace face verification"""
     verified: bool
@@ -64,6 +99,18 @@ class HealthResponse(BaseModel):
     version: str
 
 
+@app.on_event("startup")
+async def preload_models():
+    """
+    Load the face verification models at process startup instead of
+    lazily inside the first request - the first voter otherwise pays
+    several seconds of TensorFlow import and model weight loading.
+    """
+    logger.info("Preloading face verification models...")
+    get_hf_verifier(threshold=0.5)
+    logger.info("Face verification models ready")
+
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint - health check"""
@@ -136,16 +183,9 @@ async def verify_face(
         )
     
     try:
-        # Read image bytes
-        id_bytes = await id_image.read()
-        selfie_bytes = await selfie_image.read()
-        
-        # Validate file sizes (max 10MB each)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if len(id_bytes) > max_size:
-            raise HTTPException(status_code=400, detail="ID image too large (max 10MB)")
-        if len(selfie_bytes) > max_size:
-            raise HTTPException(status_code=400, detail="Selfie image too large (max 10MB)")
+        # Read image bytes, enforcing the size cap while streaming
+        id_bytes = await read_capped(id_image, MAX_UPLOAD_BYTES, "ID image")
+        selfie_bytes = await read_capped(selfie_image, MAX_UPLOAD_BYTES, "Selfie image")
         
         logger.info(f"Processing images - ID: {len(id_bytes)} bytes, Selfie: {len(selfie_bytes)} bytes")
         
@@ -185,6 +225,76 @@ async def verify_face(
         )
 
 
+@app.post("/verify-face/batch", response_model=List[VerificationResponse])
+async def verify_face_batch(
+    id_images: List[UploadFile] = File(..., description="ID photos, paired by index"),
+    selfie_images: List[UploadFile] = File(..., description="Selfie captures, paired by index")
+):
+    """
+    Verify several ID/selfie pairs in one request.
+
+    Pairs are matched by index: id_images[i] is compared against
+    selfie_images[i]. One batch request amortizes the HTTP round trip
+    and multipart overhead across the pairs, and repeated images (e.g.
+    the same ID photo against several selfies) hit the embedding cache
+    instead of being re-embedded.
+    """
+    if len(id_images) != len(selfie_images):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Mismatched batch: {len(id_images)} ID images vs "
+                   f"{len(selfie_images)} selfies"
+        )
+
+    logger.info(f"Received batch verification request - {len(id_images)} pair(s)")
+
+    allowed_types = {'image/jpeg', 'image/png', 'image/jpg', 'image/webp'}
+    responses = []
+    for index, (id_image, selfie_image) in enumerate(zip(id_images, selfie_images)):
+        try:
+            if (id_image.content_type not in allowed_types
+                    or selfie_image.content_type not in allowed_types):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid image type in pair {index}. "
+                           f"Allowed: {', '.join(allowed_types)}"
+                )
+
+            id_bytes = await read_capped(id_image, MAX_UPLOAD_BYTES, "ID image")
+            selfie_bytes = await read_capped(selfie_image, MAX_UPLOAD_BYTES, "Selfie image")
+
+            result = verify_face_huggingface(id_bytes, selfie_bytes, threshold=0.5)
+            responses.append(VerificationResponse(
+                verified=result['verified'],
+                message=result['message'],
+                similarity=result.get('similarity'),
+                distance=result.get('distance'),
+                similarity_percentage=result.get('similarity_percentage'),
+                id_face_confidence=result.get('id_face_confidence'),
+                selfie_face_confidence=result.get('selfie_face_confidence'),
+                model=result.get('model'),
+                error=result.get('error')
+            ))
+        except HTTPException as e:
+            # One bad pair shouldn't discard the rest of the batch
+            responses.append(VerificationResponse(
+                verified=False,
+                distance=None,
+                message=e.detail,
+                error="invalid_request"
+            ))
+        except Exception as e:
+            logger.error(f"Batch verification error in pair {index}: {str(e)}", exc_info=True)
+            responses.append(VerificationResponse(
+                verified=False,
+                distance=None,
+                message=f"Verification failed: {str(e)}",
+                error="server_error"
+            ))
+
+    return responses
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -212,14 +322,27 @@ if __name__ == "__main__":
     
     # Disable reload on Windows to avoid multiprocessing issues with Python 3.13
     is_windows = sys.platform.startswith('win')
-    
+
+    # Auto-reload only in development (BALLOT_DEV=1) - the reloader adds
+    # a stat-polling subprocess and forces the slower default event loop
+    dev_mode = bool(os.getenv('BALLOT_DEV')) and not is_windows
+
+    try:
+        import uvloop  # noqa: F401 - only checking availability
+        loop = "uvloop"
+    except ImportError:
+        # uvloop is optional (and unavailable on Windows) - asyncio's
+        # default loop is used instead
+        loop = "auto"
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=False if is_windows else True,  # Disable reload on Windows
-        log_level="info"
+        reload=dev_mode,
+        loop=loop,
+        log_level="info" if dev_mode else "warning"
     )
-    
+
     if is_windows:
         print("\n⚠️  Note: Auto-reload disabled on Windows. Restart server manually after code changes.")
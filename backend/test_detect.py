@@ -21,7 +21,9 @@ def main():
             return
 
     print("Initializing FaceVerifier (this may download YOLO model if missing)...")
-    start = time.time()
+    # perf_counter_ns is monotonic and unaffected by system clock
+    # adjustments, unlike time.time()
+    start = time.perf_counter_ns()
     try:
         verifier = get_verifier()
     except FaceVerificationError as e:
@@ -30,7 +32,7 @@ def main():
     except Exception as e:
         print(f"Unexpected error initializing verifier: {e}")
         return
-    elapsed = time.time() - start
+    elapsed = (time.perf_counter_ns() - start) / 1e9
     print(f"FaceVerifier initialized in {elapsed:.2f}s")
 
     if img_path is None:
@@ -1,24 +1,138 @@
 """
 Test script for enhanced face verification system
 Tests the multi-model ensemble approach with various scenarios
+
+Runs standalone (python test_enhanced_verification.py) or under pytest,
+where the cases are parametrized and independent - `pytest -n auto`
+(pytest-xdist) runs them concurrently across cores.
 """
 
 import requests
-import base64
+import hashlib
+import io
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+try:
+    import pytest
+except ImportError:
+    # pytest is optional - the script entrypoint below works without it
+    pytest = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    # OpenCV is optional here - it is only used to synthesize the tiny
+    # warmup image, and the suite runs fine without the warmup
+    cv2 = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional - responses fall back to requests' stdlib
+    # json parsing
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    # httpx is optional - it only backs the VERIFY_ASYNC mode
+    httpx = None
+
+try:
+    from requests_toolbelt import MultipartEncoder
+except ImportError:
+    # requests-toolbelt is optional - requests' in-memory multipart
+    # encoding is used instead
+    MultipartEncoder = None
+
 # API endpoint
 API_URL = "http://localhost:8000/verify-face"
 
+# One shared session so urllib3's pool keeps the localhost connection
+# alive across test cases instead of re-handshaking TCP per request
+SESSION = requests.Session()
+SESSION.mount("http://localhost", requests.adapters.HTTPAdapter(
+    pool_connections=1, pool_maxsize=4))
+
+# Record/replay mode: every live response is recorded under a hash of
+# the image pair; USE_MOCK_BACKEND=1 replays the recordings instead of
+# talking to the server - useful in CI where model accuracy is not the
+# thing under test and each live case costs seconds of inference.
+FIXTURE_DIR = Path(__file__).parent / "test_fixtures" / "verify"
+USE_MOCK_BACKEND = os.getenv("USE_MOCK_BACKEND") == "1"
+
+# VERIFY_INPROCESS=1 calls the verification pipeline directly instead of
+# going through HTTP - skips server startup plus per-request multipart
+# encode/decode when iterating on the pipeline itself
+VERIFY_INPROCESS = os.getenv("VERIFY_INPROCESS") == "1"
+
+# VERIFY_BATCH=1 sends all cases in one POST to /verify-face/batch
+# instead of one request per case
+VERIFY_BATCH = os.getenv("VERIFY_BATCH") == "1"
+
+# VERIFY_ASYNC=1 issues the case POSTs concurrently on one event loop
+# via httpx instead of the thread pool (requires httpx)
+VERIFY_ASYNC = os.getenv("VERIFY_ASYNC") == "1"
 
-def encode_image_to_base64(image_path: str) -> str:
-    """Encode image file to base64 string"""
-    with open(image_path, 'rb') as f:
-        return base64.b64encode(f.read()).decode('utf-8')
 
+def parse_json(response):
+    """Decode a JSON response body, via orjson when available"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
-def test_verification(id_image_path: str, selfie_image_path: str, test_name: str):
+
+def post_verify(id_bytes: bytes, selfie_bytes: bytes) -> dict:
+    """POST a verification pair, or replay its recorded response"""
+    key = hashlib.blake2b(id_bytes + b"|" + selfie_bytes).hexdigest()[:32]
+    fixture = FIXTURE_DIR / f"{key}.json"
+
+    if VERIFY_INPROCESS:
+        from face_verification import verify_face_match
+        return verify_face_match(id_bytes, selfie_bytes, threshold=0.45)
+
+    if USE_MOCK_BACKEND:
+        if not fixture.exists():
+            # Fail loudly rather than silently hitting the network
+            raise RuntimeError(
+                f"USE_MOCK_BACKEND=1 but no recorded fixture {fixture}; "
+                "run once against a live backend to record it"
+            )
+        return json.loads(fixture.read_text())
+
+    if MultipartEncoder is not None:
+        # Stream the parts instead of concatenating both images into one
+        # multipart body buffer before sending
+        encoder = MultipartEncoder(fields={
+            'id_image': ('id.jpg', io.BytesIO(id_bytes), 'image/jpeg'),
+            'selfie_image': ('selfie.jpg', io.BytesIO(selfie_bytes), 'image/jpeg')
+        })
+        response = SESSION.post(API_URL, data=encoder,
+                                headers={'Content-Type': encoder.content_type})
+    else:
+        response = SESSION.post(API_URL, files={
+            'id_image': ('id.jpg', id_bytes, 'image/jpeg'),
+            'selfie_image': ('selfie.jpg', selfie_bytes, 'image/jpeg')
+        })
+    result = parse_json(response)
+    if response.status_code == 200:
+        FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+        fixture.write_text(json.dumps(result))
+    return result
+
+
+# Cases run concurrently; serialize each case's report so the output
+# blocks stay readable instead of interleaving line by line
+_PRINT_LOCK = threading.Lock()
+
+
+def run_verification(id_image_path: str, selfie_image_path: str, test_name: str,
+                     image_cache: dict = None):
     """
     Test face verification with given images
     
@@ -26,132 +140,264 @@ def test_verification(id_image_path: str, selfie_image_path: str, test_name: str
         id_image_path: Path to ID photo
         selfie_image_path: Path to selfie photo
         test_name: Name of the test for logging
+        image_cache: Optional {path: bytes} of preloaded images
     """
-    print(f"\n{'='*70}")
-    print(f"TEST: {test_name}")
-    print(f"{'='*70}")
-    print(f"ID Image: {id_image_path}")
-    print(f"Selfie Image: {selfie_image_path}")
-    
     try:
-        # Prepare files
-        with open(id_image_path, 'rb') as id_file, open(selfie_image_path, 'rb') as selfie_file:
-            files = {
-                'id_image': ('id.jpg', id_file, 'image/jpeg'),
-                'selfie_image': ('selfie.jpg', selfie_file, 'image/jpeg')
-            }
-            
-            # Make request
-            response = requests.post(API_URL, files=files)
-            result = response.json()
-            
+        if image_cache is not None:
+            id_bytes = image_cache[id_image_path]
+            selfie_bytes = image_cache[selfie_image_path]
+        else:
+            id_bytes = Path(id_image_path).read_bytes()
+            selfie_bytes = Path(selfie_image_path).read_bytes()
+        result = post_verify(id_bytes, selfie_bytes)
+
+        with _PRINT_LOCK:
+            print(f"\n{'='*70}")
+            print(f"TEST: {test_name}")
+            print(f"{'='*70}")
+            print(f"ID Image: {id_image_path}")
+            print(f"Selfie Image: {selfie_image_path}")
+
             # Print results
             print(f"\n{'─'*70}")
             print(f"RESULT: {'✓ VERIFIED' if result.get('verified') else '✗ REJECTED'}")
             print(f"{'─'*70}")
             print(f"Message: {result.get('message')}")
-            
+        
             if result.get('ensemble_results'):
                 ensemble = result['ensemble_results']
                 print(f"\nEnsemble Results:")
                 print(f"  Models Agreed: {ensemble['models_verified']}/{ensemble['total_models']}")
                 print(f"  Required: {ensemble['required_agreement']}")
                 print(f"  Average Distance: {ensemble['average_distance']:.4f}")
-                
+            
                 print(f"\n  Model Details:")
                 for model in ensemble['model_details']:
                     status = "✓" if model['verified'] else "✗"
                     print(f"    {status} {model['model']:12s}: distance={model['distance']:.4f}, threshold={model['threshold']:.2f}")
-            
+        
             if result.get('quality_metrics'):
                 quality = result['quality_metrics']
                 print(f"\nQuality Metrics:")
                 print(f"  ID Quality: {quality['id_quality']} (blur: {quality['id_blur_score']:.1f})")
                 print(f"  Selfie Quality: {quality['selfie_quality']} (blur: {quality['selfie_blur_score']:.1f})")
                 print(f"  Liveness: {'✓ PASS' if quality['liveness_passed'] else '✗ FAIL'} (score: {quality['liveness_score']:.2f})")
-            
+        
             if result.get('similarity_percentage'):
                 print(f"\nSimilarity: {result['similarity_percentage']:.1f}%")
-            
+        
             if result.get('error'):
                 print(f"\nError: {result['error']}")
-            
+        
             print(f"{'='*70}\n")
-            
-            return result
-            
+
+        return result
+
     except Exception as e:
-        print(f"\n✗ ERROR: {str(e)}\n")
+        with _PRINT_LOCK:
+            print(f"\n✗ ERROR: {test_name}: {str(e)}\n")
         return None
 
 
+# Test cases - NOTE: you need to provide actual test images
+TEST_CASES = [
+    {
+        "name": "Same Person - Good Quality",
+        "id_image": "test_images/person1_id.jpg",
+        "selfie": "test_images/person1_selfie.jpg",
+        "expected": True
+    },
+    {
+        "name": "Different People",
+        "id_image": "test_images/person1_id.jpg",
+        "selfie": "test_images/person2_selfie.jpg",
+        "expected": False
+    },
+    {
+        "name": "Same Person - Different Lighting",
+        "id_image": "test_images/person1_id.jpg",
+        "selfie": "test_images/person1_selfie_dark.jpg",
+        "expected": True
+    },
+    {
+        "name": "Photo of Photo (Should Fail Liveness)",
+        "id_image": "test_images/person1_id.jpg",
+        "selfie": "test_images/person1_photo_of_photo.jpg",
+        "expected": False
+    }
+]
+
+
+if pytest is not None:
+    @pytest.mark.parametrize("case", TEST_CASES,
+                             ids=[c["name"] for c in TEST_CASES])
+    def test_verification(case):
+        """One verification case against the live backend"""
+        if (not Path(case['id_image']).exists()
+                or not Path(case['selfie']).exists()):
+            pytest.skip("test images not available")
+        try:
+            SESSION.get("http://localhost:8000/health",
+                        timeout=2).raise_for_status()
+        except Exception:
+            pytest.skip("backend server not running")
+        result = run_verification(case['id_image'], case['selfie'],
+                                  case['name'])
+        assert result is not None
+        assert result.get('verified') == case['expected']
+
+
+def warmup_backend():
+    """
+    Send one throwaway verification so the backend finishes lazy model
+    initialization before the timed/real cases start - otherwise the
+    first case absorbs several seconds of model loading.
+    """
+    if cv2 is None:
+        return
+    dummy = cv2.imencode('.jpg', np.zeros((64, 64, 3), np.uint8))[1].tobytes()
+    try:
+        SESSION.post(API_URL, files={
+            'id_image': ('warmup.jpg', dummy, 'image/jpeg'),
+            'selfie_image': ('warmup.jpg', dummy, 'image/jpeg')
+        }, timeout=60)
+        print("✓ Backend warmed up")
+    except Exception:
+        # Warmup is best-effort; the real cases report any actual failure
+        pass
+
+
+def run_async(runnable, image_cache):
+    """POST all cases concurrently from a single httpx event loop"""
+    import asyncio
+
+    async def post_case(client, tc):
+        response = await client.post(API_URL, files={
+            'id_image': ('id.jpg', image_cache[tc['id_image']], 'image/jpeg'),
+            'selfie_image': ('selfie.jpg', image_cache[tc['selfie']], 'image/jpeg')
+        })
+        response.raise_for_status()
+        return parse_json(response)
+
+    async def gather_cases():
+        async with httpx.AsyncClient(timeout=120) as client:
+            return await asyncio.gather(
+                *(post_case(client, tc) for tc in runnable),
+                return_exceptions=True
+            )
+
+    results = []
+    for tc, result in zip(runnable, asyncio.run(gather_cases())):
+        if isinstance(result, Exception):
+            print(f"\n✗ ERROR: {tc['name']}: {result}")
+            continue
+        status = '✓ VERIFIED' if result.get('verified') else '✗ REJECTED'
+        print(f"\n{tc['name']}: {status} - {result.get('message')}")
+        results.append({
+            'test': tc['name'],
+            'expected': tc['expected'],
+            'actual': result.get('verified'),
+            'passed': result.get('verified') == tc['expected']
+        })
+    return results
+
+
+def run_batch(runnable, image_cache):
+    """POST every case as one request to /verify-face/batch"""
+    files = []
+    for tc in runnable:
+        files.append(('id_images', ('id.jpg', image_cache[tc['id_image']], 'image/jpeg')))
+        files.append(('selfie_images', ('selfie.jpg', image_cache[tc['selfie']], 'image/jpeg')))
+
+    response = SESSION.post(API_URL + "/batch", files=files)
+    response.raise_for_status()
+    batch = parse_json(response)
+
+    results = []
+    for tc, result in zip(runnable, batch):
+        status = '✓ VERIFIED' if result.get('verified') else '✗ REJECTED'
+        print(f"\n{tc['name']}: {status} - {result.get('message')}")
+        results.append({
+            'test': tc['name'],
+            'expected': tc['expected'],
+            'actual': result.get('verified'),
+            'passed': result.get('verified') == tc['expected']
+        })
+    return results
+
+
 def main():
     """Run test suite"""
     print("\n" + "="*70)
     print("ENHANCED FACE VERIFICATION - TEST SUITE")
     print("="*70)
     
-    # Check if API is running
-    try:
-        health = requests.get("http://localhost:8000/health")
-        print(f"✓ API Status: {health.json()['status']}")
-    except Exception as e:
-        print(f"✗ ERROR: API not running. Please start the backend server.")
-        print(f"  Run: python backend/main.py")
-        return
-    
-    # Define test cases
-    # NOTE: You need to provide actual test images
-    test_cases = [
-        {
-            "name": "Same Person - Good Quality",
-            "id_image": "test_images/person1_id.jpg",
-            "selfie": "test_images/person1_selfie.jpg",
-            "expected": True
-        },
-        {
-            "name": "Different People",
-            "id_image": "test_images/person1_id.jpg",
-            "selfie": "test_images/person2_selfie.jpg",
-            "expected": False
-        },
-        {
-            "name": "Same Person - Different Lighting",
-            "id_image": "test_images/person1_id.jpg",
-            "selfie": "test_images/person1_selfie_dark.jpg",
-            "expected": True
-        },
-        {
-            "name": "Photo of Photo (Should Fail Liveness)",
-            "id_image": "test_images/person1_id.jpg",
-            "selfie": "test_images/person1_photo_of_photo.jpg",
-            "expected": False
-        }
-    ]
+    # Check if API is running (not needed when verifying in-process)
+    if VERIFY_INPROCESS:
+        print("✓ Running verification in-process (VERIFY_INPROCESS=1)")
+    else:
+        try:
+            health = SESSION.get("http://localhost:8000/health")
+            print(f"✓ API Status: {parse_json(health)['status']}")
+        except Exception as e:
+            print(f"✗ ERROR: API not running. Please start the backend server.")
+            print(f"  Run: python backend/main.py")
+            return
+        if not USE_MOCK_BACKEND:
+            warmup_backend()
     
-    # Run tests
-    results = []
-    for test_case in test_cases:
+    # Run tests - cases are independent POSTs, so dispatch them all at
+    # once and let the backend pipeline the verifications
+    runnable = []
+    for test_case in TEST_CASES:
         # Check if test images exist
         if not Path(test_case['id_image']).exists() or not Path(test_case['selfie']).exists():
             print(f"\n⚠ Skipping test '{test_case['name']}' - images not found")
             continue
-        
-        result = test_verification(
-            test_case['id_image'],
-            test_case['selfie'],
-            test_case['name']
-        )
-        
-        if result:
-            results.append({
-                'test': test_case['name'],
-                'expected': test_case['expected'],
-                'actual': result.get('verified'),
-                'passed': result.get('verified') == test_case['expected']
-            })
+        runnable.append(test_case)
+
+    # Several cases share the same ID photo - read each unique file once
+    # up front instead of re-reading it per case
+    image_cache = {}
+    for tc in runnable:
+        for path in (tc['id_image'], tc['selfie']):
+            if path not in image_cache:
+                image_cache[path] = Path(path).read_bytes()
+
+    if VERIFY_BATCH and not (USE_MOCK_BACKEND or VERIFY_INPROCESS):
+        results = run_batch(runnable, image_cache)
+        print_summary(results)
+        return
+
+    if (VERIFY_ASYNC and httpx is not None
+            and not (USE_MOCK_BACKEND or VERIFY_INPROCESS)):
+        results = run_async(runnable, image_cache)
+        print_summary(results)
+        return
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, len(runnable))) as executor:
+        futures = {
+            executor.submit(run_verification, tc['id_image'],
+                            tc['selfie'], tc['name'], image_cache): tc
+            for tc in runnable
+        }
+        for future in as_completed(futures):
+            test_case = futures[future]
+            result = future.result()
+            if result:
+                results.append({
+                    'test': test_case['name'],
+                    'expected': test_case['expected'],
+                    'actual': result.get('verified'),
+                    'passed': result.get('verified') == test_case['expected']
+                })
     
-    # Print summary
+    print_summary(results)
+
+
+def print_summary(results):
+    """Print the pass/fail summary for a completed run"""
     if results:
         print("\n" + "="*70)
         print("TEST SUMMARY")
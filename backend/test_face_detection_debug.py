@@ -1,142 +1,232 @@
 """
 Improved face detection test with better debugging
 """
+import argparse
 import cv2
+import functools
+import numpy as np
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def test_face_detection(image_path):
-    """Test face detection with multiple methods"""
+
+@functools.lru_cache(maxsize=1)
+def _yolo_model():
+    """Load the YOLO model once per process (weights load is seconds)"""
+    from ultralytics import YOLO
+    try:
+        model = YOLO('yolov8n-face.pt')
+        print("  Using YOLOv8n-face model")
+    except:
+        model = YOLO('yolov8n.pt')
+        print("  Using YOLOv8n general model")
+    return model
+
+
+@functools.lru_cache(maxsize=1)
+def _haar_cascade():
+    """Parse the Haar cascade XML once per process"""
+    return cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _dnn_net():
+    """Load the OpenCV DNN face detector once per process"""
+    modelFile = "opencv_face_detector_uint8.pb"
+    configFile = "opencv_face_detector.pbtxt"
+    return cv2.dnn.readNetFromTensorflow(modelFile, configFile)
+
+
+def _run_yolo(img):
+    """Run YOLO detection, returning a list of face dicts"""
+    results = _yolo_model()(img, verbose=False)
+    faces = []
+
+    for result in results:
+        boxes = result.boxes
+        for box in boxes:
+            cls_id = int(box.cls[0])
+            cls_name = result.names[cls_id].lower()
+
+            if 'face' in cls_name or 'person' in cls_name:
+                conf = float(box.conf[0])
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                faces.append({
+                    'bbox': (x1, y1, x2, y2),
+                    'confidence': conf,
+                    'class': cls_name
+                })
+    return faces
+
+
+# Reused grayscale scratch buffer - cvtColor writes into it in place
+# when consecutive images share a shape, instead of allocating per call
+_GRAY_BUF = None
+
+
+def _run_haar(img):
+    """Run Haar cascade detection, returning a list of face dicts"""
+    global _GRAY_BUF
+    if _GRAY_BUF is None or _GRAY_BUF.shape != img.shape[:2]:
+        _GRAY_BUF = np.empty(img.shape[:2], dtype=np.uint8)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=_GRAY_BUF)
+    detected = _haar_cascade().detectMultiScale(
+        gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
+    )
+
+    faces = []
+    for (x, y, w, h) in detected:
+        faces.append({
+            'bbox': (x, y, x + w, y + h),
+            'confidence': 0.8
+        })
+    return faces
+
+
+def _run_dnn(img):
+    """Run OpenCV DNN detection, returning a list of face dicts"""
+    net = _dnn_net()
+
+    blob = cv2.dnn.blobFromImage(img, 1.0, (300, 300), [104, 117, 123], False, False)
+    net.setInput(blob)
+    detections = net.forward()
+
+    faces = []
+    h, w = img.shape[:2]
+
+    for i in range(detections.shape[2]):
+        confidence = detections[0, 0, i, 2]
+        if confidence > 0.5:
+            x1 = int(detections[0, 0, i, 3] * w)
+            y1 = int(detections[0, 0, i, 4] * h)
+            x2 = int(detections[0, 0, i, 5] * w)
+            y2 = int(detections[0, 0, i, 6] * h)
+            faces.append({
+                'bbox': (x1, y1, x2, y2),
+                'confidence': float(confidence)
+            })
+    return faces
+
+
+try:
+    from joblib import Memory
+    # Cache detector results on disk keyed by image content, so
+    # re-running the script on the same image while tweaking thresholds
+    # skips the model inference entirely
+    _memory = Memory('./.face_detect_cache', verbose=0)
+    _run_yolo = _memory.cache(_run_yolo)
+    _run_haar = _memory.cache(_run_haar)
+    _run_dnn = _memory.cache(_run_dnn)
+except ImportError:
+    # joblib is optional - detectors simply run fresh each invocation
+    pass
+
+
+DETECTORS = {
+    'yolo': ('YOLO', _run_yolo),
+    'haar': ('Haar Cascade', _run_haar),
+    'dnn': ('OpenCV DNN', _run_dnn),
+}
+
+
+def _load_image(image_path):
+    """
+    Load an image, decoding at half resolution when it is large.
+
+    IMREAD_REDUCED_COLOR_2 has libjpeg downscale during decode, which is
+    both faster than a full decode and speeds up every detector pass on
+    phone-camera-sized inputs. Returns (img, scale) where scale maps
+    detected coordinates back to the original image.
+    """
+    img = cv2.imread(str(image_path), cv2.IMREAD_REDUCED_COLOR_2)
+    if img is None:
+        return None, 1
+    if max(img.shape[:2]) * 2 > 1600:
+        return img, 2
+    # Small image - the half-size decode was cheap, redo it at full
+    # resolution so detection quality is unaffected
+    return cv2.imread(str(image_path)), 1
+
+
+def _scaled_bbox(face, scale):
+    """Map a detection bbox back to original-image coordinates"""
+    if scale == 1:
+        return face['bbox']
+    return tuple(v * scale for v in face['bbox'])
+
+
+def test_face_detection(image_path, detector='yolo', exhaustive=False):
+    """Test face detection with the selected method(s)"""
     print(f"\n{'='*70}")
     print(f"Testing Face Detection: {image_path}")
     print(f"{'='*70}\n")
-    
+
     # Load image
-    img = cv2.imread(str(image_path))
+    img, scale = _load_image(image_path)
     if img is None:
         print("❌ Failed to load image")
         return
-    
-    print(f"✓ Image loaded: {img.shape[1]}x{img.shape[0]} pixels")
-    
-    # Test 1: YOLO Detection
-    print("\n[1/3] Testing YOLO face detection...")
-    try:
-        from ultralytics import YOLO
-        
-        # Try face-specific model first
+
+    print(f"✓ Image loaded: {img.shape[1] * scale}x{img.shape[0] * scale} pixels"
+          + (" (detecting at half resolution)" if scale == 2 else ""))
+
+    selected = list(DETECTORS) if detector == 'all' else [detector]
+
+    # The cheap-and-accurate YOLO pass usually settles the question;
+    # only fall through to the remaining detectors when it finds
+    # nothing, unless --exhaustive asks to compare all of them
+    results = {}
+    if detector == 'all' and not exhaustive:
         try:
-            model = YOLO('yolov8n-face.pt')
-            print("  Using YOLOv8n-face model")
-        except:
-            model = YOLO('yolov8n.pt')
-            print("  Using YOLOv8n general model")
-        
-        results = model(img, verbose=False)
-        faces_yolo = []
-        
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                cls_id = int(box.cls[0])
-                cls_name = result.names[cls_id].lower()
-                
-                if 'face' in cls_name or 'person' in cls_name:
-                    conf = float(box.conf[0])
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    faces_yolo.append({
-                        'bbox': (x1, y1, x2, y2),
-                        'confidence': conf,
-                        'class': cls_name
-                    })
-        
-        print(f"  Found {len(faces_yolo)} face(s)")
-        for i, face in enumerate(faces_yolo, 1):
-            bbox = face['bbox']
-            print(f"    Face {i}: bbox={bbox}, conf={face['confidence']:.3f}, class={face['class']}")
-            
-    except Exception as e:
-        print(f"  ❌ YOLO failed: {e}")
-        faces_yolo = []
-    
-    # Test 2: Haar Cascade Detection
-    print("\n[2/3] Testing Haar Cascade detection...")
-    try:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        
-        detected = face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30)
-        )
-        
-        faces_haar = []
-        for (x, y, w, h) in detected:
-            faces_haar.append({
-                'bbox': (x, y, x + w, y + h),
-                'confidence': 0.8
-            })
-        
-        print(f"  Found {len(faces_haar)} face(s)")
-        for i, face in enumerate(faces_haar, 1):
-            print(f"    Face {i}: bbox={face['bbox']}")
-            
-    except Exception as e:
-        print(f"  ❌ Haar Cascade failed: {e}")
-        faces_haar = []
-    
-    # Test 3: DNN Face Detection (OpenCV)
-    print("\n[3/3] Testing OpenCV DNN face detection...")
-    try:
-        # Download model if needed
-        modelFile = "opencv_face_detector_uint8.pb"
-        configFile = "opencv_face_detector.pbtxt"
-        
-        # Try to load pre-trained model
+            results['yolo'] = _run_yolo(img)
+        except Exception as e:
+            print(f"  ❌ YOLO failed: {e}")
+            results['yolo'] = []
+        if results['yolo']:
+            print("  YOLO found faces - skipping Haar/DNN (use --exhaustive to run all)")
+            selected = ['yolo']
+
+    # With --detector all the remaining detectors are independent, so
+    # run them in parallel - YOLO and the DNN release the GIL inside
+    # their native inference calls
+    pending = [name for name in selected if name not in results]
+    if len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {name: executor.submit(DETECTORS[name][1], img)
+                       for name in pending}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"  ❌ {DETECTORS[name][0]} failed: {e}")
+                results[name] = []
+    elif pending:
+        name = pending[0]
         try:
-            net = cv2.dnn.readNetFromTensorflow(modelFile, configFile)
-            
-            blob = cv2.dnn.blobFromImage(img, 1.0, (300, 300), [104, 117, 123], False, False)
-            net.setInput(blob)
-            detections = net.forward()
-            
-            faces_dnn = []
-            h, w = img.shape[:2]
-            
-            for i in range(detections.shape[2]):
-                confidence = detections[0, 0, i, 2]
-                if confidence > 0.5:
-                    x1 = int(detections[0, 0, i, 3] * w)
-                    y1 = int(detections[0, 0, i, 4] * h)
-                    x2 = int(detections[0, 0, i, 5] * w)
-                    y2 = int(detections[0, 0, i, 6] * h)
-                    faces_dnn.append({
-                        'bbox': (x1, y1, x2, y2),
-                        'confidence': float(confidence)
-                    })
-            
-            print(f"  Found {len(faces_dnn)} face(s)")
-            for i, face in enumerate(faces_dnn, 1):
-                print(f"    Face {i}: bbox={face['bbox']}, conf={face['confidence']:.3f}")
-                
+            results[name] = DETECTORS[name][1](img)
         except Exception as e:
-            print(f"  ⚠ DNN model not available: {e}")
-            faces_dnn = []
-            
-    except Exception as e:
-        print(f"  ❌ DNN detection failed: {e}")
-        faces_dnn = []
-    
+            print(f"  ❌ {DETECTORS[name][0]} failed: {e}")
+            results[name] = []
+
+    for step, name in enumerate(selected, 1):
+        label = DETECTORS[name][0]
+        faces = results[name]
+        print(f"\n[{step}/{len(selected)}] {label} detection:")
+        print(f"  Found {len(faces)} face(s)")
+        for i, face in enumerate(faces, 1):
+            extra = f", class={face['class']}" if 'class' in face else ""
+            print(f"    Face {i}: bbox={_scaled_bbox(face, scale)}, conf={face['confidence']:.3f}{extra}")
+
     # Summary
     print(f"\n{'='*70}")
     print("SUMMARY")
     print(f"{'='*70}")
-    print(f"YOLO:         {len(faces_yolo)} face(s)")
-    print(f"Haar Cascade: {len(faces_haar)} face(s)")
-    print(f"DNN:          {len(faces_dnn)} face(s)")
-    
-    if not faces_yolo and not faces_haar and not faces_dnn:
+    for name in selected:
+        print(f"{DETECTORS[name][0] + ':':14s}{len(results[name])} face(s)")
+
+    if not any(results.values()):
         print("\n❌ NO FACES DETECTED BY ANY METHOD")
         print("\nPossible issues:")
         print("  1. Face is too small in the image")
@@ -146,18 +236,28 @@ def test_face_detection(image_path):
         print("  5. Image is not a photo of a person")
     else:
         print("\n✓ At least one method detected faces")
-    
+
     print(f"{'='*70}\n")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python test_face_detection_debug.py <image_path>")
-        sys.exit(1)
-    
-    image_path = Path(sys.argv[1])
-    if not image_path.exists():
-        print(f"Error: Image not found: {image_path}")
+    parser = argparse.ArgumentParser(description="Debug face detection on an image")
+    parser.add_argument("image_path", type=Path, help="Path to the image to test")
+    parser.add_argument(
+        "--detector", choices=['yolo', 'haar', 'dnn', 'all'], default='yolo',
+        help="Which detector to run (default: yolo only, skipping the "
+             "other model loads; 'all' runs the three in parallel)"
+    )
+    parser.add_argument(
+        "--exhaustive", action="store_true",
+        help="With --detector all, run every detector even when YOLO "
+             "already found faces"
+    )
+    args = parser.parse_args()
+
+    if not args.image_path.exists():
+        print(f"Error: Image not found: {args.image_path}")
         sys.exit(1)
-    
-    test_face_detection(image_path)
+
+    test_face_detection(args.image_path, detector=args.detector,
+                        exhaustive=args.exhaustive)
@@ -3,6 +3,8 @@ End-to-end face verification test using DeepFace.
 Usage:
   python test_verify.py <id_image_path> <selfie_image_path>
 """
+import io
+import mmap
 import sys
 import time
 from pathlib import Path
@@ -33,50 +35,57 @@ def main():
 
     # Import and initialize
     print("\nΓÅ│ Loading face verification module...")
-    start = time.time()
+    # perf_counter_ns is monotonic and unaffected by system clock
+    # adjustments, unlike time.time()
+    start = time.perf_counter_ns()
     from face_verification import verify_face_match
-    load_time = time.time() - start
+    load_time = (time.perf_counter_ns() - start) / 1e9
     print(f"Γ£à Module loaded in {load_time:.2f}s")
 
-    # Read images
-    print("\nΓÅ│ Reading images...")
-    with open(id_path, 'rb') as f:
-        id_bytes = f.read()
-    with open(selfie_path, 'rb') as f:
-        selfie_bytes = f.read()
-    print(f"   ID image: {len(id_bytes):,} bytes")
-    print(f"   Selfie:   {len(selfie_bytes):,} bytes")
-
-    # Verify
-    print("\nΓÅ│ Running face verification...")
-    start = time.time()
-    result = verify_face_match(id_bytes, selfie_bytes, threshold=0.45)
-    verify_time = time.time() - start
-
-    # Display results
-    print("\n" + "=" * 60)
-    print("≡ƒôè VERIFICATION RESULT")
-    print("=" * 60)
-    
+    # Map images instead of copying them into process memory - mmap
+    # objects satisfy the buffer protocol, so hashing and decoding in
+    # verify_face_match read pages straight from the OS cache
+    print("\nΓÅ│ Mapping images...")
+    with open(id_path, 'rb') as id_file, open(selfie_path, 'rb') as selfie_file, \
+            mmap.mmap(id_file.fileno(), 0, access=mmap.ACCESS_READ) as id_bytes, \
+            mmap.mmap(selfie_file.fileno(), 0, access=mmap.ACCESS_READ) as selfie_bytes:
+        print(f"   ID image: {len(id_bytes):,} bytes")
+        print(f"   Selfie:   {len(selfie_bytes):,} bytes")
+
+        # Verify
+        print("\nΓÅ│ Running face verification...")
+        start = time.perf_counter_ns()
+        result = verify_face_match(id_bytes, selfie_bytes, threshold=0.45)
+        verify_time = (time.perf_counter_ns() - start) / 1e9
+
+    # Display results - assembled in a StringIO and flushed with a
+    # single write, so line-by-line console I/O stays out of the way
+    # (and out of any timing done around this script)
+    out = io.StringIO()
+    out.write("\n" + "=" * 60 + "\n")
+    out.write("≡ƒôè VERIFICATION RESULT\n")
+    out.write("=" * 60 + "\n")
+
     if result['verified']:
-        print("Γ£à VERIFIED - Faces match!")
+        out.write("Γ£à VERIFIED - Faces match!\n")
     else:
-        print("Γ¥î REJECTED - Faces do not match")
-    
-    print(f"\n   Distance:    {result.get('distance', 'N/A')}")
-    print(f"   Threshold:   0.45 (lower = more similar)")
-    print(f"   Message:     {result.get('message', 'N/A')}")
-    
+        out.write("Γ¥î REJECTED - Faces do not match\n")
+
+    out.write(f"\n   Distance:    {result.get('distance', 'N/A')}\n")
+    out.write(f"   Threshold:   0.45 (lower = more similar)\n")
+    out.write(f"   Message:     {result.get('message', 'N/A')}\n")
+
     if result.get('id_face_confidence'):
-        print(f"   ID Face:     {result['id_face_confidence']:.2%} confidence")
+        out.write(f"   ID Face:     {result['id_face_confidence']:.2%} confidence\n")
     if result.get('selfie_face_confidence'):
-        print(f"   Selfie Face: {result['selfie_face_confidence']:.2%} confidence")
-    
+        out.write(f"   Selfie Face: {result['selfie_face_confidence']:.2%} confidence\n")
+
     if result.get('error'):
-        print(f"   Error:       {result['error']}")
-    
-    print(f"\nΓÅ▒∩╕Å  Verification time: {verify_time:.2f}s")
-    print("=" * 60)
+        out.write(f"   Error:       {result['error']}\n")
+
+    out.write(f"\nΓÅ▒∩╕Å  Verification time: {verify_time:.2f}s\n")
+    out.write("=" * 60 + "\n")
+    sys.stdout.write(out.getvalue())
 
 
 if __name__ == '__main__':